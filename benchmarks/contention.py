@@ -0,0 +1,55 @@
+"""
+Measures `Container()` and `Inject` throughput with a growing number of
+threads resolving the same singleton dependency.
+
+    python benchmarks/contention.py
+"""
+import time
+from threading import Barrier, Thread
+
+from haps import SINGLETON_SCOPE, Container, Egg, Inject, scope
+
+THREADS = (1, 2, 4, 8)
+CALLS = 100000
+
+
+class IService:
+    pass
+
+
+@scope(SINGLETON_SCOPE)
+class Service(IService):
+    pass
+
+
+class Handler:
+    service: IService = Inject()
+
+
+def worker(barrier: Barrier) -> None:
+    barrier.wait()
+    for _ in range(CALLS):
+        Container()
+        Handler().service
+
+
+def bench(threads: int) -> float:
+    barrier = Barrier(threads + 1)
+    workers = [Thread(target=worker, args=(barrier,)) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for w in workers:
+        w.join()
+    return threads * CALLS / (time.perf_counter() - start)
+
+
+def main() -> None:
+    Container.configure([Egg(IService, Service, None, Service)])
+    for threads in THREADS:
+        print(f'{threads:>2} threads: {bench(threads):12,.0f} ops/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Measures `Container.get_object` latency depending on the number of
+registered eggs.
+
+    python benchmarks/lookup.py
+"""
+import timeit
+
+from haps import SINGLETON_SCOPE, Container, Egg, scope
+
+SIZES = (10, 1000, 10000)
+NUMBER = 100000
+
+
+def make_config(size: int) -> list:
+    config = []
+    for i in range(size):
+        base_ = type(f'Base{i}', (), {})
+        type_ = scope(SINGLETON_SCOPE)(type(f'Impl{i}', (base_,), {}))
+        config.append(Egg(base_, type_, None, type_))
+    return config
+
+
+def bench(size: int) -> float:
+    config = make_config(size)
+    Container._reset()
+    Container.configure(config)
+    container = Container()
+    # the last registered egg is the worst case for a linear scan
+    last = config[-1].base_
+    container.get_object(last)
+
+    total = timeit.timeit(lambda: container.get_object(last), number=NUMBER)
+    return total / NUMBER * 1e9
+
+
+def main() -> None:
+    for size in SIZES:
+        print(f'{size:>6} eggs: {bench(size):8.1f} ns/lookup')
+
+
+if __name__ == '__main__':
+    main()
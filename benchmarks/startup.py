@@ -0,0 +1,92 @@
+"""
+Compares cold-start time of `Container.autodiscover` with and without
+an egg manifest, using the `samples/autodiscover` tree and a generated
+tree of `SYNTHETIC_MODULES` modules. Every run uses a fresh interpreter.
+
+    python benchmarks/startup.py
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RUNS = 20
+SYNTHETIC_MODULES = 200
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = '''
+import time
+from haps import Container
+start = time.perf_counter()
+Container.autodiscover({module_paths!r}, manifest={manifest!r})
+print(time.perf_counter() - start)
+'''
+
+BASES = '''
+from haps import base
+
+
+@base
+class IService:
+    pass
+'''
+
+IMPLEMENTATION = '''
+from haps import egg
+from synthetic_services.bases import IService
+
+
+@egg('service_{i}')
+class Service{i}(IService):
+    pass
+'''
+
+
+def make_synthetic_tree(path: str, modules: int) -> None:
+    package = os.path.join(path, 'synthetic_services')
+    os.makedirs(os.path.join(package, 'impl'))
+    for name in ('__init__.py', os.path.join('impl', '__init__.py')):
+        open(os.path.join(package, name), 'w').close()
+    with open(os.path.join(package, 'bases.py'), 'w') as f:
+        f.write(BASES)
+    for i in range(modules):
+        with open(os.path.join(package, 'impl', f'm{i}.py'), 'w') as f:
+            f.write(IMPLEMENTATION.format(i=i))
+
+
+def run(module_paths: list, python_path: str,
+        manifest: str = None) -> float:
+    script = SCRIPT.format(module_paths=module_paths, manifest=manifest)
+    env = dict(os.environ, PYTHONPATH=python_path)
+    times = []
+    for _ in range(RUNS):
+        out = subprocess.check_output([sys.executable, '-c', script],
+                                      cwd=ROOT, env=env)
+        times.append(float(out))
+    return statistics.median(times) * 1000
+
+
+def compare(name: str, module_paths: list, tmp: str) -> None:
+    python_path = os.pathsep.join((tmp, ROOT))
+    manifest = os.path.join(tmp, 'manifest.json')
+    subprocess.check_call(
+        [sys.executable, '-m', 'haps.manifest', *module_paths,
+         '-o', manifest],
+        cwd=ROOT, env=dict(os.environ, PYTHONPATH=python_path))
+
+    print(name)
+    print(f'  scan:     {run(module_paths, python_path):7.2f} ms')
+    print(f'  manifest: {run(module_paths, python_path, manifest):7.2f} ms')
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        make_synthetic_tree(tmp, SYNTHETIC_MODULES)
+        compare('samples', ['samples.autodiscover.services'], tmp)
+        compare(f'synthetic ({SYNTHETIC_MODULES} modules)',
+                ['synthetic_services'], tmp)
+
+
+if __name__ == '__main__':
+    main()
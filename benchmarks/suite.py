@@ -0,0 +1,307 @@
+"""
+Resolution benchmark suite. Results are written as JSON, so they can be
+compared between haps versions:
+
+    python benchmarks/suite.py -o new.json
+    python benchmarks/suite.py -o new.json --compare old.json --threshold 1.2
+
+With `--compare` the exit status is 1 if any benchmark is slower than
+`threshold` times its previous result, or is missing from the new results.
+Benchmarks using features missing in the tested haps version are skipped.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from threading import Barrier, Thread
+from typing import Callable, Dict
+
+from startup import make_synthetic_tree
+
+import haps
+from haps import SINGLETON_SCOPE, Container, Egg, Inject, inject, scope
+
+AUTODISCOVER_SIZES = (10, 100, 500)
+INJECT_PARAMS = (0, 1, 2, 5, 10)
+THREADS = (1, 2, 4, 8)
+
+AUTODISCOVER_SCRIPT = '''
+import time
+from haps import Container
+start = time.perf_counter()
+Container.autodiscover(['synthetic_services'])
+print(time.perf_counter() - start)
+'''
+
+
+class IInstance:
+    pass
+
+
+class Instance(IInstance):
+    pass
+
+
+class ISingleton:
+    pass
+
+
+@scope(SINGLETON_SCOPE)
+class Singleton(ISingleton):
+    pass
+
+
+class IThread:
+    pass
+
+
+@scope('thread')
+class ThreadLocal(IThread):
+    pass
+
+
+class IContext:
+    pass
+
+
+@scope('context')
+class ContextLocal(IContext):
+    pass
+
+
+DEPENDENCIES = (IInstance, ISingleton, IThread)
+
+
+class IComposite:
+    pass
+
+
+class Composite(IComposite):
+    @inject
+    def __init__(self, instance: IInstance, singleton: ISingleton,
+                 thread: IThread) -> None:
+        self.instance = instance
+        self.singleton = singleton
+        self.thread = thread
+
+
+def configure() -> None:
+    Container._reset()
+    Container.configure([
+        Egg(IInstance, Instance, None, Instance),
+        Egg(ISingleton, Singleton, None, Singleton),
+        Egg(IThread, ThreadLocal, None, ThreadLocal),
+        Egg(IContext, ContextLocal, None, ContextLocal),
+        Egg(IComposite, Composite, None, Composite),
+    ])
+    from haps.scopes.thread import ThreadScope
+    Container().register_scope('thread', ThreadScope)
+    try:
+        from haps.scopes.context import ContextScope
+    except ImportError:
+        pass
+    else:
+        Container().register_scope('context', ContextScope)
+
+
+def measure(fun: Callable[[], object], number: int) -> float:
+    """
+    :return: Best time of one call, in nanoseconds
+    """
+    fun()
+    return min(timeit.repeat(fun, number=number, repeat=5)) / number * 1e9
+
+
+def bench_get_object(number: int) -> Dict[str, float]:
+    container = Container()
+    return {
+        'get_object.instance': measure(
+            lambda: container.get_object(IInstance), number),
+        'get_object.singleton': measure(
+            lambda: container.get_object(ISingleton), number),
+        'get_object.thread': measure(
+            lambda: container.get_object(IThread), number),
+        'get_object.constructor': measure(
+            lambda: container.get_object(IComposite), number),
+    }
+
+
+def bench_get_object_context(number: int) -> Dict[str, float]:
+    from haps.scopes.context import context_scope
+    container = Container()
+    with context_scope():
+        return {
+            'get_object.context': measure(
+                lambda: container.get_object(IContext), number),
+        }
+
+
+def bench_get_objects(number: int) -> Dict[str, float]:
+    container = Container()
+    keys = [(dep, None) for dep in DEPENDENCIES]
+    return {
+        'get_objects.separately': measure(
+            lambda: [container.get_object(*key) for key in keys], number),
+        'get_objects.batch': measure(
+            lambda: container.get_objects(keys), number),
+    }
+
+
+def bench_inject_descriptor(number: int) -> Dict[str, float]:
+    class Handler:
+        dep: ISingleton = Inject()
+
+    handler = Handler()
+    return {
+        'inject_descriptor.first': measure(lambda: Handler().dep, number),
+        'inject_descriptor.repeated': measure(lambda: handler.dep, number),
+    }
+
+
+def make_handler(params: int) -> Callable:
+    args = ', '.join(f'dep{i}: T{i}' for i in range(params))
+    namespace = {f'T{i}': DEPENDENCIES[i % len(DEPENDENCIES)]
+                 for i in range(params)}
+    exec(f'def handler({args}):\n    pass', namespace)
+    return inject(namespace['handler'])
+
+
+def bench_inject_decorator(number: int) -> Dict[str, float]:
+    return {
+        f'inject.params_{params}': measure(make_handler(params), number)
+        for params in INJECT_PARAMS
+    }
+
+
+def bench_autodiscover(runs: int) -> Dict[str, float]:
+    results = {}
+    for size in AUTODISCOVER_SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            make_synthetic_tree(tmp, size)
+            # the tested haps must be importable the same way as here
+            env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+                [tmp, *filter(None, sys.path)]))
+            times = [
+                float(subprocess.check_output(
+                    [sys.executable, '-c', AUTODISCOVER_SCRIPT], env=env))
+                for _ in range(runs)
+            ]
+        results[f'autodiscover.modules_{size}'] = min(times) * 1e9
+    return results
+
+
+def bench_contention(number: int) -> Dict[str, float]:
+    class Handler:
+        dep: ISingleton = Inject()
+
+    def worker(barrier: Barrier) -> None:
+        barrier.wait()
+        for _ in range(number):
+            Handler().dep
+
+    results = {}
+    for threads in THREADS:
+        barrier = Barrier(threads + 1)
+        workers = [Thread(target=worker, args=(barrier,))
+                   for _ in range(threads)]
+        for w in workers:
+            w.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for w in workers:
+            w.join()
+        # wall time per resolution, lower is better
+        results[f'contention.threads_{threads}'] = (
+            (time.perf_counter() - start) / (threads * number) * 1e9)
+    return results
+
+
+def run(quick: bool) -> Dict[str, float]:
+    number = 2000 if quick else 20000
+    benchmarks = [
+        (bench_get_object, number),
+        (bench_get_object_context, number),
+        (bench_get_objects, number),
+        (bench_inject_descriptor, number),
+        (bench_inject_decorator, number),
+        (bench_autodiscover, 2 if quick else 5),
+        (bench_contention, number),
+    ]
+    results: Dict[str, float] = {}
+    for bench, arg in benchmarks:
+        configure()
+        try:
+            results.update(bench(arg))
+        except (ImportError, AttributeError) as e:
+            print(f'{bench.__name__} skipped: {e!r}', file=sys.stderr)
+    return results
+
+
+def haps_version() -> str:
+    try:
+        from importlib.metadata import version
+        return version('haps')
+    except Exception:
+        return getattr(haps, '__version__', 'unknown')
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float],
+            threshold: float) -> bool:
+    ok = True
+    for name in sorted(baseline.keys() - results.keys()):
+        ok = False
+        print(f'{name:<32} {baseline[name]:>14.1f} {"-":>14} {"":>7}'
+              f'  MISSING')
+    for name, value in sorted(results.items()):
+        old = baseline.get(name)
+        if not old:
+            continue
+        ratio = value / old
+        regressed = ratio > threshold
+        ok = ok and not regressed
+        print(f'{name:<32} {old:>14.1f} {value:>14.1f} {ratio:>6.2f}x'
+              f'{"  REGRESSION" if regressed else ""}')
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-o', '--output', help='JSON output file')
+    parser.add_argument('--compare', help='JSON file with previous results')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='maximum allowed slowdown ratio')
+    parser.add_argument('--quick', action='store_true',
+                        help='fewer iterations, for smoke testing')
+    args = parser.parse_args()
+
+    results = run(args.quick)
+    report = {
+        'haps': haps_version(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'unit': 'ns',
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        for name, value in results.items():
+            print(f'{name:<32} {value:>14.1f} ns')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        if not compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,10 @@
 from haps import scopes
-from haps.container import (INSTANCE_SCOPE, PROFILES, SINGLETON_SCOPE,
-                            Container, Egg, Inject, base, egg, inject, scope)
+from haps.container import (ASYNC_SINGLETON_SCOPE, INSTANCE_SCOPE, PROFILES,
+                            SINGLETON_SCOPE, Container, Egg, Inject, Lazy,
+                            base, egg, inject, scope)
 
 DI = Container
 
 __all__ = ['Container', 'Inject', 'inject', 'base', 'egg', 'INSTANCE_SCOPE',
-           'SINGLETON_SCOPE', 'scope', 'Egg', 'scopes', 'PROFILES', 'DI']
+           'SINGLETON_SCOPE', 'ASYNC_SINGLETON_SCOPE', 'scope', 'Egg',
+           'scopes', 'PROFILES', 'DI', 'Lazy']
@@ -41,6 +41,9 @@ class ApplicationRunner:
         :param extra_module_paths: Extra modules list to autodiscover
         :param kwargs: Extra arguments are passed to\
                 :func:`~haps.Container.autodiscover`
+
+        When the application ends, objects kept by the scopes are disposed
+        with :meth:`~haps.Container.shutdown`.
         """
         module = app_class.__module__
         if (module == '__main__' and
@@ -67,4 +70,7 @@ class ApplicationRunner:
         Container.autodiscover(**autodiscover_kwargs)
 
         app = app_class()
-        app.run()
+        try:
+            app.run()
+        finally:
+            Container().shutdown()
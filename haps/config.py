@@ -1,13 +1,94 @@
 import os
 from functools import partial
 from threading import RLock
-from types import FunctionType
-from typing import Any, Optional, Type
+from types import FunctionType, MappingProxyType
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Tuple, Type
 
 from haps.exceptions import ConfigurationError, UnknownConfigVariable
 
 _NONE = object()
 
+_INI_TOP = '__haps_top__'
+
+_TRUE = ('1', 'true', 'yes', 'on')
+_FALSE = ('0', 'false', 'no', 'off', '')
+
+
+def _coerce(value: Any, type_: Optional[Type]) -> Any:
+    if (not isinstance(value, str) or not isinstance(type_, type) or
+            isinstance(value, type_)):
+        return value
+    try:
+        if type_ is bool:
+            lowered = value.strip().lower()
+            if lowered not in _TRUE + _FALSE:
+                raise ValueError(value)
+            return lowered in _TRUE
+        return type_(value)
+    except (TypeError, ValueError) as e:
+        raise ConfigurationError(
+            f'Cannot convert {value!r} to {type_.__name__}') from e
+
+
+def _flatten(data: Mapping[str, Any], prefix: str = '') -> Dict[str, Any]:
+    flat = {}
+    for key, value in data.items():
+        if isinstance(value, Mapping):
+            flat.update(_flatten(value, f'{prefix}{key}.'))
+        else:
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+
+def _read_file(path: str) -> Dict[str, Any]:
+    # parsers are imported lazily, they're slow to import
+    import configparser
+    import json
+
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.json':
+        return _flatten(json.loads(data))
+    elif ext == '.toml':
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ConfigurationError(
+                    'TOML files require Python 3.11+ or tomli package')
+        return _flatten(tomllib.loads(data.decode()))
+    elif ext in ('.ini', '.cfg'):
+        # keys before the first section are top level variables, and
+        # there is no DEFAULT section propagating to the other ones
+        parser = configparser.ConfigParser(interpolation=None,
+                                           default_section='')
+        parser.optionxform = str
+        parser.read_string(f'[{_INI_TOP}]\n' + data.decode())
+        flat = {}
+        for section in parser.sections():
+            prefix = '' if section == _INI_TOP else f'{section}.'
+            flat.update((prefix + key, value)
+                        for key, value in parser.items(section))
+        return flat
+    else:
+        raise ConfigurationError(f'Unsupported config file type {path}')
+
+
+class LoadReport(NamedTuple):
+    """
+    Result of :meth:`~haps.config.Configuration.load`
+    """
+    #: Names of variables stored in the configuration
+    loaded: Tuple[str, ...]
+    #: Names of loaded variables without a resolver or a declared type
+    unknown: Tuple[str, ...]
+    #: Names of variables not stored, because they were already set
+    unused: Tuple[str, ...]
+
 
 def _env_resolver(var_name: str, env_name: str = None,
                   default: Any = _NONE) -> Any:
@@ -36,11 +117,17 @@ class Configuration:
     _instance: 'Configuration' = None
 
     def __new__(cls, *args, **kwargs) -> 'Configuration':
+        instance = cls._instance
+        if instance is not None:
+            return instance
+
         with cls._lock:
             if cls._instance is None:
-                cls._instance = object.__new__(cls)
-                cls._instance.cache = {}
-                cls._instance.resolvers = {}
+                instance = object.__new__(cls)
+                instance.cache = {}
+                instance.resolvers = {}
+                instance.snapshot: Optional[Mapping[str, Any]] = None
+                cls._instance = instance
             return cls._instance
 
     def _resolve_var(self, var_name: str) -> Any:
@@ -64,6 +151,9 @@ class Configuration:
             return self.cache[var_name]
         except KeyError:
             try:
+                if self.snapshot is not None:
+                    raise UnknownConfigVariable(
+                        f'{var_name} is not set in the frozen configuration')
                 var = self._resolve_var(var_name)
             except UnknownConfigVariable as e:
                 if default is not _NONE:
@@ -91,6 +181,7 @@ class Configuration:
         :return: Function decorator
         """
         def dec(f):
+            cls._check_not_frozen()
             if var_name in cls().resolvers:
                 raise ConfigurationError(
                     f'Resolver for {var_name} already registered')
@@ -132,6 +223,7 @@ class Configuration:
                   chaining
         """
         with cls._lock:
+            cls._check_not_frozen()
             if var_name not in cls().cache:
                 cls().cache[var_name] = value
             else:
@@ -139,6 +231,85 @@ class Configuration:
                     f'Value for {var_name} already set')
         return cls()
 
+    @classmethod
+    def load(cls, path: str = None, env_prefix: str = 'HAPS_',
+             types: Mapping[str, Type] = None) -> LoadReport:
+        """
+        Load many variables at once, from environment variables starting
+        with `env_prefix` and from an optional JSON, TOML (Python 3.11+
+        or `tomli`) or INI file. Nested file sections are joined with dots,
+        e.g. `profiles` in `[haps]` section becomes `haps.profiles`.
+        Environment variables take precedence over the file.
+
+        Values are converted to `types` (see
+        :class:`~haps.config.Config`) and stored all at once. Variables
+        which are already set are left untouched.
+
+        .. code-block:: python
+
+            report = Configuration.load('settings.toml',
+                                        types={'port': int})
+            if report.unknown:
+                log.warning('Unknown settings %s', report.unknown)
+
+        :param path: Optional path to the config file
+        :param env_prefix: Prefix of environment variables
+        :param types: Types of variables
+        :return: :class:`~haps.config.LoadReport`
+        """
+        types = types or {}
+        values = _read_file(path) if path is not None else {}
+        values.update((key[len(env_prefix):], value)
+                      for key, value in os.environ.items()
+                      if key.startswith(env_prefix))
+        values = {key: _coerce(value, types.get(key))
+                  for key, value in values.items()}
+
+        with cls._lock:
+            config = cls()
+            cls._check_not_frozen()
+            new = {key: value for key, value in values.items()
+                   if key not in config.cache}
+            config.cache.update(new)
+
+        return LoadReport(
+            loaded=tuple(new),
+            unknown=tuple(key for key in values
+                          if key not in types and
+                          key not in config.resolvers),
+            unused=tuple(key for key in values if key not in new))
+
+    @classmethod
+    def _check_not_frozen(cls) -> None:
+        if cls().snapshot is not None:
+            raise ConfigurationError('Configuration is frozen')
+
+    @classmethod
+    def freeze(cls) -> 'Configuration':
+        """
+        Resolve all variables at once and freeze the configuration. After
+        that, variables can't be set or resolved, and
+        :class:`~haps.config.Config` properties are read from the
+        frozen snapshot, converted to their annotated types.
+
+        Variables which cannot be resolved (e.g. environment variables
+        without a default) are skipped.
+
+        :return: :class:`~haps.config.Configuration` instance for easy\
+                  chaining
+        """
+        with cls._lock:
+            config = cls()
+            cls._check_not_frozen()
+            for var_name in config.resolvers:
+                if var_name not in config.cache:
+                    try:
+                        config.cache[var_name] = config._resolve_var(var_name)
+                    except UnknownConfigVariable:
+                        pass
+            config.snapshot = MappingProxyType(dict(config.cache))
+        return config
+
 
 class Config:
     """
@@ -150,6 +321,10 @@ class Config:
             my_var: VarType = Config()
             custom_property_name: VarType = Config('var_name')
 
+    A variable is resolved on the first access and stored in the instance,
+    so next accesses are plain attribute reads. If the configuration is
+    frozen (see :meth:`~haps.config.Configuration.freeze`), string values
+    are converted to the annotated type (e.g. `int`, `float`, `bool`).
     """
     def __init__(self, var_name: str = None, default=_NONE) -> None:
         """
@@ -164,13 +339,29 @@ class Config:
         self._var_name = var_name
         self._type = None
         self._name = None
+        # (snapshot, value) in one attribute, so they're published together
+        self._cached: Tuple[Any, Any] = (None, None)
 
     def __get__(self, instance: 'Config', owner: Type) -> Any:
-        var = Configuration().get_var(self._var_name, self._default)
-        setattr(instance, self._var_name, var)
+        if instance is None:
+            return self
+
+        config = Configuration()
+        snapshot = config.snapshot
+        if snapshot is None:
+            var = config.get_var(self._var_name, self._default)
+        else:
+            cached_snapshot, var = self._cached
+            if cached_snapshot is not snapshot:
+                var = _coerce(
+                    config.get_var(self._var_name, self._default), self._type)
+                self._cached = (snapshot, var)
+
+        setattr(instance, self._name, var)
         return var
 
     def __set_name__(self, owner: Type, name: str) -> None:
         self._name = name
+        self._type = getattr(owner, '__annotations__', {}).get(name)
         if self._var_name is None:
             self._var_name = name
@@ -2,26 +2,58 @@ import importlib
 import inspect
 import os
 import pkgutil
-from functools import wraps
+from collections import ChainMap
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial, wraps
 from inspect import Signature
 from threading import RLock
-from types import FunctionType, ModuleType
-from typing import Any, Callable, Dict, List, Optional, Type, TypeVar, Union
+from types import FunctionType, MemberDescriptorType, ModuleType
+from typing import (Any, Callable, Dict, Generic, Iterable, Iterator, List,
+                    Mapping, NamedTuple, Optional, Sequence, Set, Tuple, Type,
+                    TypeVar, Union)
+from weakref import WeakSet
 
 from haps.config import Configuration
-from haps.exceptions import (AlreadyConfigured, ConfigurationError,
+from haps.exceptions import (AlreadyConfigured, CallError, ConfigurationError,
                              NotConfigured, UnknownDependency, UnknownScope)
-from haps.scopes import Scope
+from haps.instrumentation import (Instrumentation, TimedFactory,
+                                  timed_aprovider, timed_provider)
+from haps.scopes import Scope, _arun_disposals, _run_disposals
+from haps.scopes.async_singleton import AsyncSingletonScope
 from haps.scopes.instance import InstanceScope
 from haps.scopes.singleton import SingletonScope
 
 INSTANCE_SCOPE = '__instance'  # default scopes
 SINGLETON_SCOPE = '__singleton'
+ASYNC_SINGLETON_SCOPE = '__async_singleton'
 
 PROFILES = 'haps.profiles'
 
 T = TypeVar("T")
 
+Provider = Callable[[], Any]
+Key = Tuple[Type, Optional[str]]
+Batch = Callable[[], Tuple[Any, ...]]
+
+
+class Plan(NamedTuple):
+    """
+    Providers of the parameters of an :func:`~haps.inject` decorated
+    function, and a function resolving all of them at once.
+    """
+    providers: Tuple[Tuple[str, Provider], ...]
+    resolve: Callable[[], Dict[str, Any]]
+
+
+# eggs of a set of profiles, as a list, indexed by (base, qualifier) and
+# grouped by base
+Registry = Tuple[List['Egg'], Dict[Key, 'Egg'],
+                 Mapping[Type, Tuple[Key, ...]]]
+
+_active_container: 'ContextVar[Optional[Container]]' = ContextVar(
+    'haps_active_container', default=None)
+
 
 class Egg:
     """
@@ -32,10 +64,14 @@ class Egg:
     qualifier: Optional[str]
     egg: Callable
     profile: Optional[str]
+    dispose: Optional[Callable[[Any], Any]]
+    fork_safe: bool
 
     def __init__(self, base_: Optional[Type], type_: Type,
                  qualifier: Optional[str], egg_: Callable,
-                 profile: str = None) -> None:
+                 profile: str = None,
+                 dispose: Callable[[Any], Any] = None,
+                 fork_safe: bool = True) -> None:
         """
         :param base_: `base` of dependency, used to retrieve object
         :param type_: `type` of dependency (for functions it's a return type)
@@ -44,12 +80,20 @@ class Egg:
         :param egg_: any callable that returns an instance of dependency, can
             be a class or a function
         :param profile: dependency profile name
+        :param dispose: called with the object on
+            :meth:`~haps.Container.shutdown`, can be a coroutine function.
+            By default objects that are context managers are exited.
+        :param fork_safe: `False` if the object can't be used in a forked
+            process (e.g. it holds a socket), it's dropped from the scopes
+            of the child process and created again when needed
         """
         self.base_ = base_
         self.type_ = type_
         self.qualifier = qualifier
         self.egg = egg_
         self.profile = profile
+        self.dispose = dispose
+        self.fork_safe = fork_safe
 
     def __repr__(self):
         return (f'<haps.container.Egg base_={repr(self.base_)} '
@@ -65,6 +109,174 @@ def _profiles_resolver() -> tuple:
     return tuple()
 
 
+def _collection(type_: Any) -> Optional[Tuple[type, Type]]:
+    """
+    :return: (`list` or `dict`, base) for `List[base]` and `Dict[str, base]`
+        annotations, `None` for other types
+    """
+    origin = getattr(type_, '__origin__', None)
+    args = getattr(type_, '__args__', ())
+    if origin is list and len(args) == 1:
+        return list, args[0]
+    if origin is dict and len(args) == 2:
+        return dict, args[1]
+    return None
+
+
+_UNRESOLVED = object()
+
+
+class Lazy(Generic[T]):
+    """
+    Annotation of a dependency resolved on the first use, for dependencies
+    used only sometimes. A proxy is injected, calling it returns
+    the dependency, and its attributes are forwarded to the dependency.
+
+    .. code-block:: python
+
+        @inject
+        def handle(request, mailer: Lazy[IMailer]) -> None:
+            if request.failed:
+                mailer.send(...)  # or mailer().send(...)
+
+    Every injection gets a new proxy, which resolves the dependency once.
+    """
+
+    __slots__ = ('_provider', '_obj')
+
+    def __init__(self, provider: Callable[[], T]) -> None:
+        self._provider = provider
+        self._obj = _UNRESOLVED
+
+    def __call__(self) -> T:
+        obj = self._obj
+        if obj is _UNRESOLVED:
+            obj = self._obj = self._provider()
+        return obj
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self(), name)
+
+    def __repr__(self):
+        if self._obj is _UNRESOLVED:
+            return '<haps.Lazy unresolved>'
+        return f'<haps.Lazy {self._obj!r}>'
+
+
+def _lazy(type_: Any) -> Optional[Type]:
+    """
+    :return: base of `Lazy[base]` annotations, `None` for other types
+    """
+    if getattr(type_, '__origin__', None) is Lazy:
+        return type_.__args__[0]
+    return None
+
+
+def _implementations(keys: Iterable[Key],
+                     implementations: Mapping[Type, Tuple[Key, ...]] = None
+                     ) -> Mapping[Type, Tuple[Key, ...]]:
+    """
+    Groups `keys` by base, after the keys in `implementations`. Only bases
+    with new keys are stored, on top of `implementations`, so it's never
+    copied.
+    """
+    parent = implementations or {}
+    added: Dict[Type, Tuple[Key, ...]] = {}
+    for key in keys:
+        base_ = key[0]
+        added[base_] = added.get(base_, parent.get(base_, ())) + (key,)
+    if implementations is None:
+        return added
+    if not added:
+        return implementations
+    return ChainMap(added, implementations)
+
+
+def _raising(exc_class: Type[Exception], *args: Any) -> Provider:
+    def provider():
+        raise exc_class(*args)
+
+    return provider
+
+
+def _activating(container: 'Container', provider: Provider) -> Provider:
+    def activating_provider():
+        token = _active_container.set(container)
+        try:
+            return provider()
+        finally:
+            _active_container.reset(token)
+
+    return activating_provider
+
+
+def _disposer(egg_: Optional[Egg], obj: Any,
+              asynchronous: bool) -> Optional[Provider]:
+    if egg_ is not None and egg_.dispose is not None:
+        return partial(egg_.dispose, obj)
+    if asynchronous and hasattr(obj, '__aexit__'):
+        return partial(obj.__aexit__, None, None, None)
+    if hasattr(obj, '__exit__'):
+        return partial(obj.__exit__, None, None, None)
+    if hasattr(obj, '__aexit__'):
+        return partial(obj.__aexit__, None, None, None)
+    return None
+
+
+def _resolver(providers: Sequence[Provider], locked: Dict[int, Provider],
+              names: Sequence[str] = None) -> Callable[[], Any]:
+    """
+    Generates a function calling `providers` with straight-line code, and
+    returning the objects as a tuple, or a dict if `names` are given.
+    Providers with indexes in `locked` are replaced with their unlocked
+    versions, called with one acquisition of the container lock.
+    """
+    namespace: Dict[str, Any] = {'_container': Container}
+    lines = []
+    for i, provider in enumerate(providers):
+        namespace[f'_p{i}'] = locked.get(i, provider)
+        if i not in locked:
+            lines.append(f'    _{i} = _p{i}()')
+    if locked:
+        # called after the others, so the lock isn't held while unlocked
+        # providers take their own locks
+        lines.append('    with _container._lock:')
+        lines.extend(f'        _{i} = _p{i}()' for i in locked)
+
+    if names is None:
+        result = ''.join(f'_{i}, ' for i in range(len(providers)))
+        lines.append(f'    return ({result})')
+    else:
+        result = ', '.join(f'{name!r}: _{i}' for i, name in enumerate(names))
+        lines.append(f'    return {{{result}}}')
+
+    exec('def resolve():\n' + '\n'.join(lines) + '\n', namespace)
+    return namespace['resolve']
+
+
+def _constructor(cls: Type, init: Callable,
+                 providers: Dict[str, Provider]) -> Provider:
+    """
+    Generates a factory creating `cls` with straight-line code, calling
+    the undecorated `init` with dependencies taken from `providers`.
+    """
+    namespace: Dict[str, Any] = {'_new': object.__new__, '_cls': cls,
+                                 '_init': init}
+    args = []
+    for i, (name, provider) in enumerate(providers.items()):
+        namespace[f'_p{i}'] = provider
+        args.append(f'{name}=_p{i}()')
+
+    exec('def factory():\n'
+         '    obj = _new(_cls)\n'
+         f'    _init(obj, {", ".join(args)})\n'
+         '    return obj\n', namespace)
+
+    factory = namespace['factory']
+    factory.__qualname__ = factory.__name__ = f'create_{cls.__name__}'
+    return factory
+
+
 class Container:
     """
     Dependency Injection container class
@@ -72,60 +284,142 @@ class Container:
     __instance = None
     __subclass = None
     __configured = False
+    __groups: Dict[Optional[str], List[Egg]] = {}
+    __registries: Dict[Tuple[str, ...], 'Registry'] = {}
     _lock = RLock()
 
     def __new__(cls, *args, **kwargs) -> 'Container':
+        active = _active_container.get()
+        if active is not None:
+            return active
+
+        # lock-free fast path, the instance is published fully configured
+        instance = cls.__instance
+        if instance is not None:
+            return instance
+
         with cls._lock:
             if not cls.__configured:
                 raise NotConfigured
             if cls.__instance is None:
-                class_ = cls if cls.__subclass is None else cls.__subclass
-                cls.__instance = object.__new__(class_)
-                cls.__instance.scopes: Dict[str, Scope] = {}
-                cls.__instance.config: List[Egg] = []
+                cls.__instance = cls.__create()
 
             return cls.__instance
 
+    @classmethod
+    def __create(cls) -> 'Container':
+        class_ = cls if cls.__subclass is None else cls.__subclass
+        instance = object.__new__(class_)
+        instance._init(scopes={}, config=[], eggs={}, implementations={})
+        return instance
+
+    def _init(self, scopes: Dict[str, Scope], config: List[Egg],
+              eggs: Mapping[Key, Egg],
+              implementations: Mapping[Type, Tuple[Key, ...]],
+              parent: 'Container' = None,
+              overrides: Dict[Key, Egg] = None
+              ) -> None:
+        self.scopes = scopes
+        self.config = config
+        self._eggs = eggs
+        self._implementations = implementations
+        self._parent = parent
+        self._overrides = overrides or {}
+        self._instrumentation: Optional[Instrumentation] = (
+            parent._instrumentation if parent is not None else None)
+        self._providers: Dict[Key, Provider] = {}
+        self._plans: Dict[Callable, Plan] = {}
+        self._batches: Dict[Tuple[Key, ...], Batch] = {}
+        # providers of scopes which are not thread safe, without locking
+        self._unlocked: Dict[Key, Provider] = {}
+        self._compiling: Set[Key] = set()
+        # eggs by factory, built when an object is disposed first
+        self._by_factory: Optional[Dict[Callable, Egg]] = None
+
     @classmethod
     def _reset(cls):
         cls.__instance = None
         cls.__subclass = None
         cls.__configured = False
+        cls.__groups = {}
+        cls.__registries = {}
 
     @staticmethod
-    def configure(config: List[Egg], subclass: 'Container' = None) -> None:
-        """
-        Configure haps manually, an alternative
-        to :func:`~haps.Container.autodiscover`
-
-        :param config: List of configured Eggs
-        :param subclass: Optional Container subclass that should be used
-        """
-
-        profiles = Configuration().get_var(PROFILES, tuple)
-        assert isinstance(profiles, (list, tuple))
-        profiles = tuple(profiles) + (None,)
+    def _group_by_profile(config: List[Egg]) -> Dict[Optional[str], List[Egg]]:
+        groups: Dict[Optional[str], List[Egg]] = {}
+        for egg_ in config:
+            groups.setdefault(egg_.profile, []).append(egg_)
+        return groups
 
+    @staticmethod
+    def _registry(groups: Dict[Optional[str], List[Egg]],
+                  profiles: Tuple[str, ...]) -> Registry:
         seen = set()
-        registered = set()
+        index: Dict[Key, Egg] = {}
 
         filtered_config: List[Egg] = []
 
-        for profile in profiles:
-            for egg_ in (e for e in config if e.profile == profile):
+        for profile in profiles + (None,):
+            for egg_ in groups.get(profile, ()):
                 ident = (egg_.base_, egg_.qualifier, egg_.profile)
                 if ident in seen:
                     raise ConfigurationError(
                         "Ambiguous implementation %s" % repr(egg_.base_))
                 dep_ident = (egg_.base_, egg_.qualifier)
-                if dep_ident in registered:
+                if dep_ident in index:
                     continue
 
                 filtered_config.append(egg_)
 
-                registered.add(dep_ident)
+                index[dep_ident] = egg_
                 seen.add(ident)
-        config = filtered_config
+
+        from haps.graph import DependencyGraph
+        DependencyGraph(filtered_config).validate()
+
+        return filtered_config, index, _implementations(index)
+
+    @classmethod
+    def __build(cls, registry: Registry) -> 'Container':
+        container = cls.__create()
+        container.config, container._eggs, container._implementations = (
+            registry)
+        _scope_owners.add(container)
+
+        container.register_scope(INSTANCE_SCOPE, InstanceScope)
+        container.register_scope(SINGLETON_SCOPE, SingletonScope)
+        container.register_scope(ASYNC_SINGLETON_SCOPE, AsyncSingletonScope)
+        return container
+
+    @staticmethod
+    def configure(config: List[Egg], subclass: 'Container' = None,
+                  precompile: Iterable[Sequence[str]] = ()) -> None:
+        """
+        Configure haps manually, an alternative
+        to :func:`~haps.Container.autodiscover`
+
+        Missing dependencies and dependency cycles (see
+        :class:`~haps.graph.DependencyGraph`) are reported here, as
+        :class:`~haps.exceptions.ConfigurationError`.
+
+        :param config: List of configured Eggs
+        :param subclass: Optional Container subclass that should be used
+        :param precompile: Other sets of profiles, which are validated
+            and prepared up front for :meth:`~haps.Container.use_profiles`
+        """
+
+        profiles = Configuration().get_var(PROFILES, tuple)
+        assert isinstance(profiles, (list, tuple))
+        profiles = tuple(profiles)
+
+        if not all(isinstance(o, Egg) for o in config):
+            raise ConfigurationError('All config items should be the eggs')
+
+        groups = Container._group_by_profile(config)
+        registries: Dict[Tuple[str, ...], Registry] = {}
+        for profiles_ in (profiles, *map(tuple, precompile)):
+            if profiles_ not in registries:
+                registries[profiles_] = Container._registry(groups, profiles_)
 
         with Container._lock:
             if Container.__configured:
@@ -134,27 +428,89 @@ class Container:
                 subclass = Container
 
             Container.__subclass = subclass
+            Container.__groups = groups
+            Container.__registries = registries
+
+            Container.__instance = Container.__build(registries[profiles])
             Container.__configured = True
 
-            container = Container()
-            if not all(isinstance(o, Egg) for o in config):
-                raise ConfigurationError('All config items should be the eggs')
-            container.config = config
+    @classmethod
+    def use_profiles(cls, profiles: Sequence[str]) -> 'Container':
+        """
+        Replace the configured container with a new one, using eggs of
+        other profiles. Eggs are not scanned again, and registries of
+        profiles passed to :meth:`~haps.Container.configure` as
+        `precompile` are ready, so switching is cheap.
+
+        .. code-block:: python
 
-            container.register_scope(INSTANCE_SCOPE, InstanceScope)
-            container.register_scope(SINGLETON_SCOPE, SingletonScope)
+            Container.autodiscover(['my.package'], precompile=[('test',)])
+            Container.use_profiles(('test',))
+
+        The new container starts with empty scopes, of the same classes
+        (including the ones added with :meth:`~haps.Container.register_scope`),
+        and keeps the instrumentation. The previous one is not shut down,
+        and the `haps.profiles` variable is not changed.
+
+        :param profiles: Profiles, in the order of precedence
+        :return: The new container
+        """
+        profiles = tuple(profiles)
+        with Container._lock:
+            if not Container.__configured:
+                raise NotConfigured
+            registry = Container.__registries.get(profiles)
+            if registry is None:
+                registry = Container._registry(Container.__groups, profiles)
+                Container.__registries[profiles] = registry
+
+            previous = Container.__instance
+            container = Container.__build(registry)
+            for name, _scope in previous.scopes.items():
+                if name not in container.scopes:
+                    container.register_scope(name, type(_scope))
+            container._instrumentation = previous._instrumentation
+            Container.__instance = container
+            return container
 
     @classmethod
     def autodiscover(cls,
                      module_paths: List[str],
-                     subclass: 'Container' = None) -> None:
+                     subclass: 'Container' = None,
+                     manifest: str = None,
+                     parallel: bool = False,
+                     max_workers: int = None,
+                     precompile: Iterable[Sequence[str]] = ()) -> None:
         """
         Load all modules automatically and find bases and eggs.
 
+        If a manifest (see :mod:`haps.manifest`) is given, modules are not
+        scanned. Eggs are read from the manifest and their modules are
+        imported when the eggs are used for the first time.
+
         :param module_paths: List of paths that should be discovered
         :param subclass: Optional Container subclass that should be used
+        :param manifest: Optional path to the manifest file
+        :param parallel: Read modules (bytecode or sources) with a thread
+            pool first, for slow file systems. Modules are imported
+            afterwards in the usual order, so eggs are registered the same
+            way as in sequential mode.
+        :param max_workers: Optional size of the thread pool
+        :param precompile: Other sets of profiles, see
+            :meth:`~haps.Container.configure`
         """
+        with cls._lock:
+            if manifest is None:
+                config = cls._discover(module_paths, parallel, max_workers)
+            else:
+                from haps.manifest import load_manifest
+                config = load_manifest(manifest)
+
+            cls.configure(config, subclass=subclass, precompile=precompile)
 
+    @classmethod
+    def _discover(cls, module_paths: List[str], parallel: bool = False,
+                  max_workers: int = None) -> List[Egg]:
         def find_base(bases: set, implementation: Type):
             found = {b for b in bases if issubclass(implementation, b)}
             if not found:
@@ -183,7 +539,44 @@ class Container:
                         results.update(walk(full_name))
             return results
 
+        def warm(pkgs: List[str]) -> None:
+            # modules are only read here, never executed: eggs registered
+            # by imports of other modules can't be ordered afterwards
+            # imported lazily, it's slow to import
+            from concurrent.futures import ThreadPoolExecutor
+            from importlib.machinery import ModuleSpec, PathFinder
+            from importlib.util import find_spec
+
+            def read(spec: ModuleSpec) -> List[ModuleSpec]:
+                try:
+                    get_code = getattr(spec.loader, 'get_code', None)
+                    if get_code is not None:
+                        get_code(spec.name)
+                    locations = spec.submodule_search_locations
+                    if not locations:
+                        return []
+                    return [
+                        PathFinder.find_spec(f'{spec.name}.{name}',
+                                             locations)
+                        for _, name, _ in pkgutil.iter_modules(locations)
+                    ]
+                except Exception:
+                    # raised again by the import
+                    return []
+
+            with ThreadPoolExecutor(max_workers) as pool:
+                level = [find_spec(pkg) for pkg in pkgs]
+                while level:
+                    level = [
+                        child
+                        for children in pool.map(
+                            read, [spec for spec in level if spec])
+                        for child in children
+                    ]
+
         with cls._lock:
+            if parallel:
+                warm(module_paths)
             for module_path in module_paths:
                 walk(module_path)
 
@@ -193,11 +586,205 @@ class Container:
                 egg_.base_ = base_
                 config.append(egg_)
 
-            cls.configure(config, subclass=subclass)
+            return config
 
     def _find_egg(self, base_: Type, qualifier: str) -> Optional[Egg]:
-        return next((e for e in self.config
-                     if e.base_ is base_ and e.qualifier == qualifier), None)
+        return self._eggs.get((base_, qualifier))
+
+    def _lookup(self, base_: Type, qualifier: str) -> Tuple[Egg, Scope]:
+        egg_ = self._find_egg(base_, qualifier)
+        if egg_ is None:
+            raise UnknownDependency('Unknown dependency %s' % base_)
+
+        scope_id = getattr(egg_.egg, '__haps_custom_scope', INSTANCE_SCOPE)
+
+        try:
+            _scope = self.scopes[scope_id]
+        except KeyError:
+            raise UnknownScope('Unknown scopes with id %s' % scope_id)
+
+        # lazy factories of a manifest know it before they're imported
+        if (not _scope.async_factories and
+                (inspect.iscoroutinefunction(egg_.egg) or
+                 getattr(egg_.egg, '__haps_async', False))):
+            raise CallError(f'Async factory of {base_!r} is not supported '
+                            f'by scope {scope_id}, use ASYNC_SINGLETON_SCOPE')
+        return egg_, _scope
+
+    def _egg_of(self, factory: Callable) -> Optional[Egg]:
+        """
+        :return: Egg of the `factory`, looked up in the parents too
+        """
+        by_factory = self._by_factory
+        if by_factory is None:
+            by_factory = {egg_.egg: egg_ for egg_ in self.config}
+            self._by_factory = by_factory
+        egg_ = by_factory.get(factory)
+        if egg_ is None and self._parent is not None:
+            return self._parent._egg_of(factory)
+        return egg_
+
+    def _compile_collection(self, kind: type, base_: Type) -> Provider:
+        keys = self._implementations.get(base_, ())
+        if kind is dict:
+            return self._compile_batch(keys, [q for _, q in keys])
+
+        resolve = self._compile_batch(keys)
+
+        def provider():
+            return list(resolve())
+
+        return provider
+
+    def _compile_provider(self, base_: Type, qualifier: str) -> Provider:
+        lazy = _lazy(base_)
+        if lazy is not None:
+            # resolved through get_object, so nothing is compiled
+            # before the first use
+            resolve = partial(self.get_object, lazy, qualifier)
+            return partial(Lazy, resolve)
+
+        collection = _collection(base_)
+        if collection is not None and qualifier is None:
+            return self._compile_collection(*collection)
+
+        try:
+            egg_, _scope = self._lookup(base_, qualifier)
+        except (UnknownDependency, UnknownScope, CallError) as e:
+            return _raising(type(e), *e.args)
+
+        scope_id = getattr(egg_.egg, '__haps_custom_scope', INSTANCE_SCOPE)
+        if self._parent is None:
+            return self._scope_provider(egg_, scope_id, _scope)
+
+        if self._creates((base_, qualifier), scope_id):
+            return _activating(
+                self, self._scope_provider(egg_, scope_id, _scope))
+        else:
+            return _activating(self._parent,
+                               self._parent._provider(base_, qualifier))
+
+    def _creates(self, key: Key, scope_id: str) -> bool:
+        """
+        Whether a child container creates the dependency itself.
+        Overridden and instance scoped dependencies are created by
+        the child, cached ones are shared with (and created by) the parent,
+        so they never see the overrides. Isolated children have their own
+        scopes, so they create everything.
+        """
+        return (key in self._overrides or scope_id == INSTANCE_SCOPE or
+                self.scopes is not self._parent.scopes)
+
+    def _scope_provider(self, egg_: Egg, scope_id: str,
+                        _scope: Scope) -> Provider:
+        factory = egg_.egg
+        instrumentation = self._instrumentation
+        if instrumentation is not None:
+            factory = TimedFactory(factory, egg_.base_, egg_.qualifier,
+                                   scope_id, instrumentation)
+
+        if type(_scope) is InstanceScope and instrumentation is None:
+            constructor = self._compile_constructor(factory)
+            if constructor is not None:
+                return constructor
+
+        unlocked = _scope.bind(factory)
+        if not self._locked(_scope):
+            provider = unlocked
+        else:
+            # the lock is looked up on call, it's replaced after fork
+            def provider(_get=unlocked):
+                with Container._lock:
+                    return _get()
+
+            # batches lock once, children activate themselves first
+            if instrumentation is None and self._parent is None:
+                self._unlocked[(egg_.base_, egg_.qualifier)] = unlocked
+
+        if instrumentation is not None:
+            provider = timed_provider(provider, factory)
+        return provider
+
+    def _locked(self, _scope: Scope) -> bool:
+        """
+        Whether `_scope` is called with the container lock. Creation locks
+        of thread safe scopes are taken with the container lock held, when
+        other scopes need it, and never the other way around, e.g. by
+        a singleton resolving a dependency of a custom scope.
+        """
+        if not _scope.thread_safe:
+            return True
+        return _scope.locks_creation and not all(
+            other.thread_safe for other in self.scopes.values())
+
+    def _compile_constructor(self, factory: Callable) -> Optional[Provider]:
+        """
+        Returns a generated factory for classes with :func:`~haps.inject`
+        decorated `__init__`, which are created the usual way (no custom
+        `__new__` or metaclass `__call__`), or `None` otherwise.
+        """
+        if not isinstance(factory, type):
+            return None
+        init = factory.__init__
+        injectables = getattr(init, '__haps_injectables', None)
+        # only the @inject wrapper itself is skipped, never other decorators
+        wrapped = getattr(init, '__wrapped__', None)
+        if (injectables is None or wrapped is None or
+                hasattr(wrapped, '__haps_injectables') or
+                inspect.iscoroutinefunction(init) or
+                factory.__new__ is not object.__new__ or
+                type(factory).__call__ is not type.__call__):
+            return None
+
+        # dependency cycle, the generic path reports it when called
+        if any((type_, None) in self._compiling
+               for type_ in injectables.values()):
+            return None
+
+        providers = {name: self._provider(type_)
+                     for name, type_ in injectables.items()}
+        return _constructor(factory, wrapped, providers)
+
+    def _provider(self, base_: Type, qualifier: str = None) -> Provider:
+        """
+        Returns a callable creating/retrieving the dependency. Providers are
+        compiled once per container and reused.
+        """
+        key = (base_, qualifier)
+        try:
+            return self._providers[key]
+        except KeyError:
+            self._compiling.add(key)
+            try:
+                provider = self._compile_provider(base_, qualifier)
+            finally:
+                self._compiling.discard(key)
+            self._providers[key] = provider
+            return provider
+
+    def _batch(self, keys: Tuple[Key, ...]) -> Batch:
+        try:
+            return self._batches[keys]
+        except KeyError:
+            batch = self._compile_batch(keys)
+            self._batches[keys] = batch
+            return batch
+
+    def _compile_batch(self, keys: Tuple[Key, ...],
+                       names: Sequence[str] = None) -> Callable[[], Any]:
+        providers = [self._provider(*key) for key in keys]
+        locked = {i: self._unlocked[key]
+                  for i, key in enumerate(keys) if key in self._unlocked}
+        return _resolver(providers, locked, names)
+
+    def _compile_plan(self, fun: Callable,
+                      injectables: Dict[str, Type]) -> Plan:
+        keys = tuple((type_, None) for type_ in injectables.values())
+        plan = Plan(providers=tuple((name, self._provider(type_))
+                                    for name, type_ in injectables.items()),
+                    resolve=self._compile_batch(keys, tuple(injectables)))
+        self._plans[fun] = plan
+        return plan
 
     def get_object(self, base_: Type[T], qualifier: str = None) -> T:
         """
@@ -206,23 +793,306 @@ class Container:
         If the qualifier is not None, proper method to create/retrieve instance
         is  used.
 
+        `List[Base]` returns a list of all implementations of `Base`, and
+        `Dict[str, Base]` a dict of them by qualifier (`None` for the egg
+        without a qualifier). `Lazy[Base]` returns a :class:`~haps.Lazy`
+        proxy. Collections and proxies work with :class:`~haps.Inject`
+        and :func:`~haps.inject` annotations as well.
+
+        .. code-block:: python
+
+            plugins = Container().get_object(List[IPlugin])
+
         :param base_: `base` of this object
         :param qualifier: optional qualifier
         :return: object instance
         """
-        egg_ = self._find_egg(base_, qualifier)
-        if egg_ is None:
-            raise UnknownDependency('Unknown dependency %s' % base_)
+        return self._provider(base_, qualifier)()
+
+    def get_objects(self, keys: Iterable[Key]) -> Tuple[Any, ...]:
+        """
+        Get many instances at once. Lookups are made once per set of keys,
+        and dependencies in scopes which are not thread safe are resolved
+        with a single acquisition of the container lock.
+
+        .. code-block:: python
+
+            db, mailer = Container().get_objects([(IDatabase, None),
+                                                  (IMailer, 'smtp')])
 
+        :param keys: (`base`, qualifier) pairs
+        :return: Tuple of object instances, in the order of `keys`
+        """
+        return self._batch(tuple(keys))()
+
+    async def aget_object(self, base_: Type[T], qualifier: str = None) -> T:
+        """
+        Get instance directly from the container, awaiting async factories.
+
+        .. code-block:: python
+
+            db = await Container().aget_object(IDatabase)
+
+        :param base_: `base` of this object
+        :param qualifier: optional qualifier
+        :return: object instance
+        """
+        if _lazy(base_) is not None:
+            # proxies resolve synchronously, when they are used
+            return self.get_object(base_, qualifier)
+
+        collection = _collection(base_)
+        if collection is not None and qualifier is None:
+            kind, base_ = collection
+            keys = self._implementations.get(base_, ())
+            objects = [await self.aget_object(*key) for key in keys]
+            if kind is dict:
+                return dict(zip((q for _, q in keys), objects))
+            return objects
+
+        egg_, _scope = self._lookup(base_, qualifier)
         scope_id = getattr(egg_.egg, '__haps_custom_scope', INSTANCE_SCOPE)
+        if self._parent is None:
+            return await self._aresolve(egg_, scope_id, _scope)
 
+        # like the providers of children, see _compile_provider
+        creates = self._creates((base_, qualifier), scope_id)
+        token = _active_container.set(self if creates else self._parent)
         try:
-            _scope = self.scopes[scope_id]
-        except KeyError:
-            raise UnknownScope('Unknown scopes with id %s' % scope_id)
-        else:
-            with self._lock:
-                return _scope.get_object(egg_.egg)
+            if creates:
+                return await self._aresolve(egg_, scope_id, _scope)
+            return await self._parent.aget_object(base_, qualifier)
+        finally:
+            _active_container.reset(token)
+
+    async def _aresolve(self, egg_: Egg, scope_id: str,
+                        _scope: Scope) -> Any:
+        factory = egg_.egg
+        instrumentation = self._instrumentation
+        if instrumentation is not None:
+            factory = TimedFactory(factory, egg_.base_, egg_.qualifier,
+                                   scope_id, instrumentation)
+            aprovider = partial(self._aget_from_scope, factory, _scope)
+            return await timed_aprovider(aprovider, factory)()
+        return await self._aget_from_scope(factory, _scope)
+
+    async def _aget_from_scope(self, factory: Callable, _scope: Scope) -> Any:
+        if not self._locked(_scope):
+            return await _scope.aget_object(factory)
+
+        # the lock is released before awaiting
+        with Container._lock:
+            obj = _scope.get_object(factory)
+        if inspect.isawaitable(obj):
+            obj = await obj
+        return obj
+
+    def child(self, overrides: List[Egg] = (),
+              isolated: bool = False) -> 'Container':
+        """
+        Create a child container, which uses `overrides` instead of
+        the eggs registered in this container. Creating a child is cheap,
+        it shares scopes (and cached objects) with the parent.
+
+        Dependencies cached by the parent scopes (e.g. singletons) are
+        created by the parent, so they never use the overrides.
+
+        An `isolated` child gets new, empty instances of the parent scopes,
+        so it creates (and caches) all dependencies on its own, e.g. for
+        tests running in parallel.
+
+        .. code-block:: python
+
+            tenant = Container().child([
+                Egg(ITenant, Tenant, None, lambda: Tenant(tenant_id))
+            ])
+            with tenant.activate():
+                handle_request()
+
+        :param overrides: List of eggs overriding the parent eggs
+        :param isolated: Don't share scopes with the parent
+        :return: Child container
+        """
+        if not all(isinstance(o, Egg) for o in overrides):
+            raise ConfigurationError('All config items should be the eggs')
+
+        index = {(e.base_, e.qualifier): e for e in overrides}
+        child = object.__new__(type(self))
+        scopes = self.scopes
+        if isolated:
+            scopes = {name: type(_scope)() for name, _scope in scopes.items()}
+        implementations = _implementations(
+            (key for key in index if key not in self._eggs),
+            self._implementations)
+        child._init(scopes=scopes, config=list(overrides),
+                    eggs=ChainMap(index, self._eggs),
+                    implementations=implementations, parent=self,
+                    overrides=index)
+        if isolated:
+            _scope_owners.add(child)
+        return child
+
+    @contextmanager
+    def activate(self) -> Iterator['Container']:
+        """
+        Context manager making this container the one returned by
+        `Container()`, so also used by :class:`~haps.Inject` and
+        :func:`~haps.inject`. Works per thread and per asyncio task.
+        """
+        token = _active_container.set(self)
+        try:
+            yield self
+        finally:
+            _active_container.reset(token)
+
+    def prewarm(self, parallel: bool = False, max_workers: int = None,
+                fork_safe_only: bool = False) -> None:
+        """
+        Create all :data:`~haps.SINGLETON_SCOPE` dependencies up front, in
+        dependency order, so the first injections don't pay for them.
+
+        Called before forking worker processes with `fork_safe_only`, it
+        skips eggs which are not `fork_safe` and eggs depending on them,
+        so workers share the created objects (copy-on-write) and create
+        the others on their own.
+
+        :param parallel: Create independent dependencies concurrently
+        :param max_workers: Optional size of the thread pool
+        :param fork_safe_only: Create only dependencies which can be
+            inherited by forked processes
+        """
+        from haps.graph import DependencyGraph
+
+        graph = DependencyGraph(self.config, load_lazy=True)
+        graph_levels = graph.levels()
+
+        unsafe = set()
+        if fork_safe_only:
+            for level in graph_levels:
+                for key in level:
+                    if (not graph.eggs[key].fork_safe or
+                            any(dep in unsafe
+                                for dep in graph.dependencies.get(key, ()))):
+                        unsafe.add(key)
+
+        levels = [
+            [key for key in level
+             if key not in unsafe and
+             getattr(graph.eggs[key].egg, '__haps_custom_scope',
+                     INSTANCE_SCOPE) == SINGLETON_SCOPE]
+            for level in graph_levels
+        ]
+
+        if not parallel:
+            for level in levels:
+                for key in level:
+                    self.get_object(*key)
+            return
+
+        # imported lazily, it's slow to import
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers) as pool:
+            for level in levels:
+                list(pool.map(lambda key: self.get_object(*key), level))
+
+    def _disposals(self, asynchronous: bool) -> List[Provider]:
+        """
+        Removes objects from all scopes and returns callables disposing
+        them, dependent objects first.
+        """
+        if self not in _scope_owners:
+            # scopes shared with the parent, they're not this child's
+            return []
+
+        from haps.graph import DependencyGraph
+
+        # ordered before the scopes are emptied, so objects are disposed
+        # even if the graph is broken. Manifest eggs are never validated
+        # at configure time, and unused ones are not imported here.
+        config = list(self._eggs.values())
+        eggs = {egg_.egg: egg_ for egg_ in config}
+        depths = {
+            key: depth
+            for depth, level in enumerate(
+                DependencyGraph(config).levels(validate=False))
+            for key in level
+        }
+
+        objects = [pair for _scope in self.scopes.values()
+                   for pair in _scope.shutdown()]
+        if not objects:
+            return []
+
+        def depth(pair: Tuple[Callable, Any]) -> int:
+            egg_ = eggs.get(pair[0])
+            if egg_ is None:
+                return -1
+            return depths.get((egg_.base_, egg_.qualifier), -1)
+
+        # scopes return objects in creation order, so objects of one
+        # level are disposed in reverse creation order
+        objects.reverse()
+        objects.sort(key=depth, reverse=True)
+
+        disposals = []
+        for type_, obj in objects:
+            disposal = _disposer(eggs.get(type_), obj, asynchronous)
+            if disposal is not None:
+                disposals.append(disposal)
+        return disposals
+
+    def shutdown(self) -> None:
+        """
+        Dispose all objects kept by the scopes (e.g. singletons), objects
+        depending on others first. The `dispose` callable of the egg is
+        called with the object, otherwise objects that are context managers
+        are exited. Scopes are emptied, so the objects are created again
+        when needed.
+
+        Async disposals are run with :func:`asyncio.run`, use
+        :meth:`~haps.Container.ashutdown` in async applications.
+
+        All objects are disposed even if some disposal fails, the first
+        error is raised afterwards.
+
+        Child containers sharing scopes with the parent (not `isolated`)
+        dispose nothing, the objects belong to the parent.
+        """
+        _run_disposals(self._disposals(asynchronous=False))
+
+    async def ashutdown(self) -> None:
+        """
+        Like :meth:`~haps.Container.shutdown`, but awaits async disposals
+        in the running event loop, and prefers `__aexit__` of objects
+        that are both sync and async context managers.
+        """
+        await _arun_disposals(self._disposals(asynchronous=True))
+
+    def _after_fork(self) -> None:
+        unsafe = {egg_.egg for egg_ in self._eggs.values()
+                  if not egg_.fork_safe}
+        for _scope in self.scopes.values():
+            _scope.after_fork(unsafe)
+
+    def instrument(self,
+                   instrumentation: Optional[Instrumentation]) -> None:
+        """
+        Enable instrumentation of resolutions made by this container, or
+        disable it by passing `None`.
+
+        :param instrumentation: Instrumentation instance, e.g.
+            :class:`~haps.instrumentation.MetricsCollector`
+        """
+        with self._lock:
+            self._instrumentation = instrumentation
+            self._invalidate()
+
+    def _invalidate(self) -> None:
+        self._providers.clear()
+        self._unlocked.clear()
+        self._plans.clear()
+        self._batches.clear()
 
     def register_scope(self, name: str, scope_class: Type[Scope]) -> None:
         """
@@ -235,6 +1105,7 @@ class Container:
             if name in self.scopes:
                 raise AlreadyConfigured(f'Scope {name} already registered')
             self.scopes[name] = scope_class()
+            self._invalidate()
 
     def __rshift__(self, other: Type[T]) -> T:
         """
@@ -245,6 +1116,21 @@ class Container:
         return self.get_object(other)
 
 
+# containers owning their scopes, reset in forked processes
+_scope_owners: 'WeakSet[Container]' = WeakSet()
+
+
+def _after_fork_in_child() -> None:
+    # locks could be held by threads which don't exist in the child
+    Container._lock = RLock()
+    for container in list(_scope_owners):
+        container._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
 class Inject:
     """
     A descriptor for injecting dependencies as properties
@@ -260,30 +1146,76 @@ class Inject:
         the attribute, not at the moment of instance creation. So, even if
         you create an instance of `SomeClass`, the instance of `DepType` may
         never be created.
+
+    The injected object is stored in the instance `__dict__` under
+    the property name, so next accesses are plain attribute reads.
+    Classes without `__dict__` (using `__slots__`) have to provide a slot
+    for the object:
+
+    .. code-block:: python
+
+        class SlottedClass:
+            __slots__ = ('_my_dep',)
+            my_dep: DepType = Inject(slot='_my_dep')
+
+    With `lazy` set, a :class:`~haps.Lazy` proxy is stored instead, so
+    the dependency is resolved when it's used, not when the attribute is
+    accessed (e.g. to pass it along).
     """
 
-    def __init__(self, qualifier: str = None):
+    def __init__(self, qualifier: str = None, slot: str = None,
+                 lazy: bool = False):
+        """
+        :param qualifier: extra qualifier of the dependency
+        :param slot: name of a slot used to store the dependency, for
+            classes without `__dict__`
+        :param lazy: inject a :class:`~haps.Lazy` proxy
+        """
         self._qualifier = qualifier
-        self._type: Type = None
-        self.__prop_name = '__haps_%s_%s_instance' % ('', id(self))
+        self._slot = slot
+        self._lazy = lazy
+        self._slot_descriptor: Optional[MemberDescriptorType] = None
+        self._name: Optional[str] = None
+        self.type_: Optional[Type] = None
+        # resolved type, Lazy[type_] for lazy properties
+        self._base: Optional[Type] = None
 
     def __get__(self, instance: Any, owner: Type) -> Any:
         if instance is None:
             return self
-        else:
-            obj = getattr(instance, self.__prop_name, None)
-            if obj is None:
-                obj = Container().get_object(self.type_, self._qualifier)
-                setattr(instance, self.__prop_name, obj)
+
+        slot = self._slot_descriptor
+        if slot is None:
+            obj = Container().get_object(self._base, self._qualifier)
+            instance.__dict__[self._name] = obj
+            return obj
+
+        try:
+            return slot.__get__(instance, owner)
+        except AttributeError:
+            obj = Container().get_object(self._base, self._qualifier)
+            slot.__set__(instance, obj)
             return obj
 
     def __set_name__(self, owner: Type, name: str) -> None:
         type_: Type = owner.__annotations__.get(name)
         if type_ is not None:
             self.type_ = type_
+            self._base = Lazy[type_] if self._lazy else type_
         else:
             raise TypeError('No annotation for Inject')
 
+        self._name = name
+        if self._slot is not None:
+            slot = getattr(owner, self._slot, None)
+            if not isinstance(slot, MemberDescriptorType):
+                raise TypeError(f'No slot {self._slot} for Inject')
+            self._slot_descriptor = slot
+        elif not owner.__dictoffset__:
+            raise TypeError(
+                f'{owner.__qualname__} has no __dict__, '
+                f'Inject needs a slot for {name}')
+
 
 def inject(fun: Callable) -> Callable:
     """
@@ -303,6 +1235,16 @@ def inject(fun: Callable) -> Callable:
         at the moment of method invocation. In case of decorating `__init__`,
         dependency is injected when `SomeClass` instance is created.
 
+    .. note::
+        Providers of all dependencies are looked up once, on the first call
+        after the container is configured, and reused by later calls.
+        Instance scoped eggs with decorated `__init__` get a generated
+        factory calling the providers directly, skipping this decorator.
+
+    Coroutine functions can be decorated too. Their dependencies are
+    resolved with :meth:`~haps.Container.aget_object`, so async factories
+    are awaited.
+
     :param fun: callable with annotated parameters
     :return: decorated callable
     """
@@ -316,15 +1258,36 @@ def inject(fun: Callable) -> Callable:
         else:
             injectables[name] = type_
 
+    if inspect.iscoroutinefunction(fun):
+        @wraps(fun)
+        async def _ainner(*args, **kwargs):
+            container = Container()
+            for n, t in injectables.items():
+                if n not in kwargs:
+                    kwargs[n] = await container.aget_object(t)
+
+            return await fun(*args, **kwargs)
+
+        _ainner.__haps_injectables = injectables
+        return _ainner
+
     @wraps(fun)
     def _inner(*args, **kwargs):
         container = Container()
-        for n, t in injectables.items():
-            if n not in kwargs:
-                kwargs[n] = container.get_object(t)
+        try:
+            plan = container._plans[fun]
+        except KeyError:
+            plan = container._compile_plan(fun, injectables)
+        if kwargs:
+            for n, provider in plan.providers:
+                if n not in kwargs:
+                    kwargs[n] = provider()
+        else:
+            kwargs = plan.resolve()
 
         return fun(*args, **kwargs)
 
+    _inner.__haps_injectables = injectables
     return _inner
 
 
@@ -344,7 +1307,8 @@ base.classes = set()
 Factory_T = Callable[..., T]
 
 
-def egg(qualifier: Union[str, Type] = '', profile: str = None):
+def egg(qualifier: Union[str, Type] = '', profile: str = None,
+        dispose: Callable[[Any], Any] = None, fork_safe: bool = True):
     """
     A function that returns a decorator (or acts like a decorator)
     that marks class or function as a source of `base`.
@@ -352,7 +1316,12 @@ def egg(qualifier: Union[str, Type] = '', profile: str = None):
     If a class is decorated, it should inherit from `base` type.
 
     If a function is decorated, it declared return type should inherit from
-    some `base` type, or it should be the `base` type.
+    some `base` type, or it should be the `base` type. The function can be
+    a coroutine function, in this case the dependency has to be retrieved
+    with :meth:`~haps.Container.aget_object` (or injected into a coroutine
+    function), and usually it should be scoped with
+    :data:`~haps.ASYNC_SINGLETON_SCOPE` or
+    :data:`~haps.INSTANCE_SCOPE`.
 
     .. code-block:: python
 
@@ -368,10 +1337,19 @@ def egg(qualifier: Union[str, Type] = '', profile: str = None):
         def dep_factory() -> DepType:
             return SomeDepImpl()
 
+        @egg(qualifier='async_dep', dispose=lambda dep: dep.close())
+        @scope(ASYNC_SINGLETON_SCOPE)
+        async def async_dep_factory() -> DepType:
+            return await connect()
+
     :param qualifier: extra qualifier for dependency. Can be used to
             register more than one type for one base. If non-string argument
             is passed, it'll act like a decorator.
     :param profile: An optional profile within this dependency should be used
+    :param dispose: An optional callable disposing the object on
+            :meth:`~haps.Container.shutdown`
+    :param fork_safe: `False` if the object can't be inherited by forked
+            processes, see :class:`~haps.Egg`
     :return: decorator
     """
     first_arg = qualifier
@@ -388,13 +1366,16 @@ def egg(qualifier: Union[str, Type] = '', profile: str = None):
                     qualifier=qualifier,
                     egg_=obj,
                     base_=None,
-                    profile=profile
+                    profile=profile,
+                    dispose=dispose,
+                    fork_safe=fork_safe
                 ))
             return obj
         elif isinstance(obj, type):
             egg.factories.append(
                 Egg(type_=obj, qualifier=qualifier, egg_=obj, base_=None,
-                    profile=profile))
+                    profile=profile, dispose=dispose,
+                    fork_safe=fork_safe))
             return obj
         else:
             raise AttributeError('Wrong egg obj type')
@@ -24,3 +24,11 @@ class CallError(TypeError):
 
 class UnknownConfigVariable(ConfigurationError):
     pass
+
+
+class InactiveScope(CallError):
+    pass
+
+
+class PoolExhausted(Exception):
+    pass
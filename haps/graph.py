@@ -0,0 +1,172 @@
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+from haps.container import Egg, Inject, _collection, _lazy
+from haps.exceptions import ConfigurationError
+from haps.manifest import LazyFactory
+
+Key = Tuple[Type, Optional[str]]
+
+
+def _describe(key: Key) -> str:
+    base_, qualifier = key
+    name = getattr(base_, '__qualname__', repr(base_))
+    return name if qualifier is None else f'{name}[{qualifier}]'
+
+
+def _injectables(fun: Callable) -> List[Key]:
+    injectables = getattr(fun, '__haps_injectables', {})
+    return [(type_, None) for type_ in injectables.values()]
+
+
+class DependencyGraph:
+    """
+    Dependencies between eggs, found in :func:`~haps.inject` decorated
+    factories and `__init__` methods (needed to create an object) and in
+    :class:`~haps.Inject` properties (needed after an object is created).
+    Collections (`List[base]` and `Dict[str, base]`) depend on all eggs
+    of the base. :class:`~haps.Lazy` dependencies are resolved after
+    an object is created, like properties, so they may form cycles.
+
+    Eggs from a manifest are analysed once they are used, or if `load_lazy`
+    is set, since it imports their modules.
+    """
+
+    def __init__(self, eggs: Iterable[Egg], load_lazy: bool = False) -> None:
+        self.eggs: Dict[Key, Egg] = {}
+        self.dependencies: Dict[Key, List[Key]] = {}
+        self.properties: Dict[Key, List[Key]] = {}
+
+        for egg_ in eggs:
+            key = (egg_.base_, egg_.qualifier)
+            self.eggs[key] = egg_
+
+            factory = egg_.egg
+            if isinstance(factory, LazyFactory):
+                if not (load_lazy or factory.loaded):
+                    continue
+                factory = factory.load()
+
+            if isinstance(factory, type):
+                self.dependencies[key] = _injectables(factory.__init__)
+                self.properties[key] = [
+                    (value.type_, value._qualifier)
+                    for cls in factory.__mro__
+                    for value in vars(cls).values()
+                    if isinstance(value, Inject)
+                ]
+            else:
+                self.dependencies[key] = _injectables(factory)
+
+        # Lazy[base] is not needed to create an object
+        for key, key_deps in self.dependencies.items():
+            lazy = [(_lazy(dep[0]), dep[1]) for dep in key_deps
+                    if _lazy(dep[0]) is not None]
+            if lazy:
+                self.dependencies[key] = [dep for dep in key_deps
+                                          if _lazy(dep[0]) is None]
+                self.properties.setdefault(key, []).extend(lazy)
+        for key, key_deps in self.properties.items():
+            self.properties[key] = [(_lazy(dep[0]) or dep[0], dep[1])
+                                    for dep in key_deps]
+
+        # List[base] and Dict[str, base] depend on all implementations
+        implementations: Dict[Type, List[Key]] = {}
+        for key in self.eggs:
+            implementations.setdefault(key[0], []).append(key)
+        for deps in (self.dependencies, self.properties):
+            for key, key_deps in deps.items():
+                deps[key] = [
+                    expanded
+                    for dep in key_deps
+                    for expanded in self._expand(dep, implementations)
+                ]
+
+    @staticmethod
+    def _expand(dep: Key,
+                implementations: Dict[Type, List[Key]]) -> List[Key]:
+        collection = _collection(dep[0])
+        if collection is None or dep[1] is not None:
+            return [dep]
+        return implementations.get(collection[1], [])
+
+    def missing(self) -> List[Tuple[Key, Key]]:
+        """
+        :return: List of (egg, dependency) pairs, for dependencies without
+            any egg
+        """
+        return [
+            (key, dep)
+            for deps in (self.dependencies, self.properties)
+            for key, key_deps in deps.items()
+            for dep in key_deps
+            if dep not in self.eggs
+        ]
+
+    def cycles(self) -> List[List[Key]]:
+        """
+        :return: List of dependency cycles, every cycle starts and ends with
+            the same egg
+        """
+        cycles = []
+        done = set()
+        path: List[Key] = []
+
+        def visit(key: Key) -> None:
+            if key in path:
+                cycles.append(path[path.index(key):] + [key])
+                return
+            if key in done:
+                return
+            path.append(key)
+            for dep in self.dependencies.get(key, ()):
+                visit(dep)
+            path.pop()
+            done.add(key)
+
+        for key in self.dependencies:
+            visit(key)
+        return cycles
+
+    def levels(self, validate: bool = True) -> List[List[Key]]:
+        """
+        Groups eggs so all dependencies of an egg are in the previous
+        groups. Eggs within one group are independent of each other.
+
+        :param validate: Raise for an invalid graph (see
+            :meth:`~haps.graph.DependencyGraph.validate`), otherwise
+            missing dependencies are skipped and cycles are cut anywhere
+        :return: List of egg groups
+        """
+        if validate:
+            self.validate()
+        depths: Dict[Key, int] = {}
+
+        def depth(key: Key) -> int:
+            if key not in depths:
+                # a placeholder, so cycles end here
+                depths[key] = -1
+                depths[key] = 1 + max(
+                    (depth(dep) for dep in self.dependencies.get(key, ())
+                     if dep in self.eggs),
+                    default=-1)
+            return depths[key]
+
+        levels: List[List[Key]] = []
+        for key in self.eggs:
+            d = depth(key)
+            levels.extend([] for _ in range(d + 1 - len(levels)))
+            levels[d].append(key)
+        return levels
+
+    def validate(self) -> None:
+        """
+        Raises :class:`~haps.exceptions.ConfigurationError` if there is any
+        missing dependency or a cycle
+        """
+        for key, dep in self.missing():
+            raise ConfigurationError(
+                f'Missing dependency {_describe(dep)} '
+                f'required by {_describe(key)}')
+        for cycle in self.cycles():
+            raise ConfigurationError(
+                'Circular dependency %s' % ' -> '.join(map(_describe, cycle)))
@@ -0,0 +1,166 @@
+"""
+Egg manifest, a way to skip scanning packages at startup.
+
+The manifest is built once (e.g. while building a package or an image):
+
+.. code-block:: bash
+
+    python -m haps.manifest my_application -o haps.json
+
+and then used instead of scanning:
+
+.. code-block:: python
+
+    Container.autodiscover(['my_application'], manifest='haps.json')
+
+Eggs read from the manifest are lazy, the module of an egg is imported when
+the egg is used for the first time. Modules with bases are imported
+at startup.
+"""
+import importlib
+import inspect
+import json
+import os
+import sys
+from typing import Any, Callable, Dict, List, Optional
+
+from haps.container import Container, Egg
+from haps.exceptions import ConfigurationError
+
+VERSION = 1
+
+
+def _qualified_name(obj: Any) -> str:
+    name = f'{obj.__module__}:{obj.__qualname__}'
+    # <locals>, <lambda> and the like
+    if '<' in name:
+        raise ConfigurationError(f'{name} is not importable')
+    return name
+
+
+def _import(qualified_name: str) -> Any:
+    module, name = qualified_name.split(':')
+    obj = importlib.import_module(module)
+    for part in name.split('.'):
+        obj = getattr(obj, part)
+    return obj
+
+
+class LazyFactory:
+    """
+    Egg factory importing the real one at the first call.
+    """
+
+    def __init__(self, qualified_name: str, scope: str = None,
+                 is_async: bool = False) -> None:
+        """
+        :param qualified_name: `module:name` of the real factory
+        :param scope: Scope of the real factory
+        :param is_async: Whether the real factory is a coroutine function,
+            so scopes can reject it before it's imported
+        """
+        self.qualified_name = qualified_name
+        self._factory: Optional[Callable] = None
+        if scope is not None:
+            setattr(self, '__haps_custom_scope', scope)
+        if is_async:
+            setattr(self, '__haps_async', True)
+
+    def load(self) -> Callable:
+        """
+        Imports the module and returns the real factory
+        """
+        if self._factory is None:
+            self._factory = _import(self.qualified_name)
+        return self._factory
+
+    @property
+    def loaded(self) -> bool:
+        """
+        Whether the real factory is imported already
+        """
+        return self._factory is not None
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self.load()(*args, **kwargs)
+
+    def __repr__(self):
+        return f'<haps.manifest.LazyFactory {self.qualified_name}>'
+
+
+def build_manifest(module_paths: List[str]) -> Dict[str, Any]:
+    """
+    Imports all modules (like :func:`~haps.Container.autodiscover`) and
+    describes found eggs.
+
+    :param module_paths: List of paths that should be discovered
+    :return: JSON serializable manifest
+    """
+    eggs = []
+    for egg_ in Container._discover(module_paths):
+        eggs.append({
+            'base': _qualified_name(egg_.base_),
+            'egg': _qualified_name(egg_.egg),
+            'qualifier': egg_.qualifier,
+            'profile': egg_.profile,
+            'scope': getattr(egg_.egg, '__haps_custom_scope', None),
+            'dispose': (None if egg_.dispose is None
+                        else _qualified_name(egg_.dispose)),
+            'fork_safe': egg_.fork_safe,
+            'async': inspect.iscoroutinefunction(egg_.egg),
+        })
+    return {'version': VERSION, 'eggs': eggs}
+
+
+def load_manifest(path: str) -> List[Egg]:
+    """
+    Reads the manifest file and creates lazy eggs.
+
+    :param path: Path to the manifest file
+    :return: List of eggs, ready to be passed to\
+            :func:`~haps.Container.configure`
+    """
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != VERSION:
+        raise ConfigurationError(
+            f'Unsupported manifest version {manifest.get("version")!r}')
+
+    return [
+        Egg(base_=_import(e['base']),
+            type_=None,
+            qualifier=e['qualifier'],
+            egg_=LazyFactory(e['egg'], e['scope'], e.get('async', False)),
+            profile=e['profile'],
+            # LazyFactory imports the hook when it's called
+            dispose=(None if e.get('dispose') is None
+                     else LazyFactory(e['dispose'])),
+            fork_safe=e.get('fork_safe', True))
+        for e in manifest['eggs']
+    ]
+
+
+def main(argv: List[str] = None) -> None:
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog='haps-manifest',
+        description='Build haps egg manifest for faster startup.')
+    parser.add_argument('module_paths', nargs='+',
+                        help='packages that should be discovered')
+    parser.add_argument('-o', '--output', default='-',
+                        help='output file, stdout by default')
+    args = parser.parse_args(argv)
+
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    data = json.dumps(build_manifest(args.module_paths), indent=2)
+
+    if args.output == '-':
+        print(data)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(data + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,140 @@
-from typing import Any, Callable
+import inspect
+from functools import partial
+from typing import Any, Callable, Collection, Iterable, List, Optional, Tuple
+
+from haps.exceptions import NotConfigured
 
 
 class Scope:
     """
     Base scope class. Every custom scope should subclass this.
+
+    Scopes that are not `thread_safe` are called by the container while
+    holding its global lock.
+
+    Scopes which hold their own locks while calling factories set
+    `locks_creation`. When any scope of the container is not thread safe,
+    they are called with the global lock as well, so the locks are always
+    taken in the same order. The global lock is never held while
+    awaiting, so :meth:`~haps.Container.aget_object` calls `get_object`
+    of these scopes, and awaits the result after releasing the lock.
+
+    Factories which are coroutine functions are rejected, unless the scope
+    sets `async_factories`, since scopes keeping objects would keep
+    the coroutine instead of its result.
     """
 
+    thread_safe = False
+    locks_creation = False
+    async_factories = False
+
     def get_object(self, type_: Callable) -> Any:
         """
         Returns object from scope
         :param type_:
         """
         raise NotImplementedError
+
+    def bind(self, type_: Callable) -> Callable[[], Any]:
+        """
+        Returns a callable without arguments equivalent to
+        `get_object(type_)`, used by the container as the provider
+        of the dependency. Scopes can override it to skip per call
+        lookups.
+        :param type_:
+        """
+        return partial(self.get_object, type_)
+
+    async def aget_object(self, type_: Callable) -> Any:
+        """
+        Returns object from scope, awaiting it if it's awaitable (e.g. the
+        result of an async factory)
+        :param type_:
+        """
+        obj = self.get_object(type_)
+        if inspect.isawaitable(obj):
+            obj = await obj
+        return obj
+
+    def shutdown(self) -> List[Tuple[Callable, Any]]:
+        """
+        Removes all objects from the scope, called by
+        :meth:`~haps.Container.shutdown` to dispose them. Scopes that
+        don't keep objects return nothing.
+
+        :return: List of (factory, object) pairs
+        """
+        return []
+
+    def after_fork(self, unsafe: Collection[Callable]) -> None:
+        """
+        Called in a child process after fork. Scopes should create their
+        locks again, since they could be held by threads which don't exist
+        in the child, and drop objects created by `unsafe` factories
+        (without disposing them, they are shared with the parent).
+        :param unsafe: Factories of eggs which are not `fork_safe`
+        """
+
+
+def _disposal(type_: Callable, obj: Any) -> Optional[Callable[[], Any]]:
+    """
+    Returns a callable disposing `obj` the way
+    :meth:`~haps.Container.shutdown` does, with the `dispose` of the egg
+    of `type_` in the current container, or `None` if there is nothing
+    to do. Used by scopes releasing objects on their own.
+    """
+    # imported lazily, haps.container imports the scopes
+    from haps.container import Container, _disposer
+    try:
+        egg_ = Container()._egg_of(type_)
+    except NotConfigured:
+        egg_ = None
+    return _disposer(egg_, obj, asynchronous=False)
+
+
+def _dispose(type_: Callable, objects: Iterable[Any]) -> None:
+    """
+    Disposes `objects` created by `type_` right away, see :func:`_disposal`
+    and :func:`_run_disposals`.
+    """
+    _run_disposals(
+        disposal for disposal in (_disposal(type_, obj) for obj in objects)
+        if disposal is not None)
+
+
+def _run_disposals(disposals: Iterable[Callable[[], Any]]) -> None:
+    """
+    Calls all `disposals`, even if some fail, and raises the first error
+    afterwards. Awaitables they return are run with :func:`asyncio.run`.
+    """
+    error = None
+    for dispose in disposals:
+        try:
+            result = dispose()
+            if inspect.isawaitable(result):
+                import asyncio  # imported lazily, it's slow to import
+                asyncio.run(_awaiting(result))
+        except Exception as e:
+            error = error or e
+    if error is not None:
+        raise error
+
+
+async def _arun_disposals(disposals: Iterable[Callable[[], Any]]) -> None:
+    """
+    Like :func:`_run_disposals`, but awaits the awaitables.
+    """
+    error = None
+    for dispose in disposals:
+        try:
+            result = dispose()
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            error = error or e
+    if error is not None:
+        raise error
+
+
+async def _awaiting(awaitable: Any) -> Any:
+    return await awaitable
@@ -0,0 +1,59 @@
+import inspect
+from typing import Any, Callable, Collection, Dict, List, Tuple
+
+from haps.exceptions import CallError
+from haps.scopes import Scope
+
+
+class AsyncSingletonScope(Scope):
+    """
+    Dependencies within AsyncSingletonScope are created only once in
+    the application context, and their factories can be coroutine
+    functions.
+
+    Only one creation per dependency runs at a time, concurrent awaiters
+    wait for the same result. If the creation fails, the next await retries.
+    """
+
+    thread_safe = True
+    async_factories = True
+
+    def __init__(self) -> None:
+        self._futures: Dict[Callable, Any] = {}
+
+    def get_object(self, type_: Callable) -> Any:
+        future = self._futures.get(type_)
+        if future is None or not future.done() or future.cancelled():
+            raise CallError(
+                f'{type_!r} is not created yet, use aget_object')
+        return future.result()
+
+    async def aget_object(self, type_: Callable) -> Any:
+        import asyncio  # imported lazily, it's slow to import
+        future = self._futures.get(type_)
+        if future is None:
+            future = asyncio.ensure_future(self._create(type_))
+            self._futures[type_] = future
+        # a cancelled awaiter must not cancel the creation for the others
+        return await asyncio.shield(future)
+
+    async def _create(self, type_: Callable) -> Any:
+        try:
+            obj = type_()
+            if inspect.isawaitable(obj):
+                obj = await obj
+        except BaseException:
+            del self._futures[type_]
+            raise
+        return obj
+
+    def after_fork(self, unsafe: Collection[Callable]) -> None:
+        for type_ in [t for t in self._futures if t in unsafe]:
+            del self._futures[type_]
+
+    def shutdown(self) -> List[Tuple[Callable, Any]]:
+        futures = list(self._futures.items())
+        self._futures.clear()
+        return [(type_, future.result()) for type_, future in futures
+                if future.done() and not future.cancelled() and
+                future.exception() is None]
@@ -0,0 +1,165 @@
+from collections import OrderedDict
+from contextvars import copy_context
+from functools import partial
+from threading import Lock, RLock, Thread
+from time import monotonic
+from typing import Any, Callable, Collection, Dict, List, Optional, Tuple
+
+from haps.scopes import Scope, _dispose, _run_disposals
+
+
+class _Entry:
+    __slots__ = ('obj', 'created', 'refreshing')
+
+    def __init__(self, obj: Any) -> None:
+        self.obj = obj
+        self.created = monotonic()
+        self.refreshing = False
+
+
+class CachingScope(Scope):
+    """
+    Base of the scopes caching one object per dependency, until it expires
+    (`ttl`) or is evicted as the least recently used one (`max_size`).
+
+    Parameters are class attributes, so they are configured by
+    subclassing:
+
+    .. code-block:: python
+
+        class CredentialsScope(TTLScope):
+            ttl = 15 * 60
+            background_refresh = True
+
+            def dispose(self, obj):
+                obj.close()
+
+        Container().register_scope('credentials', CredentialsScope)
+    """
+
+    thread_safe = True
+    locks_creation = True
+
+    #: Seconds after which an object is created again, `None` to never
+    #: expire
+    ttl: Optional[float] = None
+    #: Maximum number of cached objects, `None` for no limit
+    max_size: Optional[int] = None
+    #: Return expired objects while a new one is created in the background,
+    #: so callers never wait for re-creation
+    background_refresh = False
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._entries: 'OrderedDict[Callable, _Entry]' = OrderedDict()
+        self._locks: Dict[Callable, RLock] = {}
+
+    def dispose(self, obj: Any) -> None:
+        """
+        Called with every expired or evicted object, after it's replaced
+        in the cache. The object is disposed like
+        :meth:`~haps.Container.shutdown` disposes it as well.
+
+        :param obj: Object removed from the cache
+        """
+
+    def _expired(self, entry: _Entry) -> bool:
+        ttl = self.ttl
+        return ttl is not None and entry.created + ttl <= monotonic()
+
+    def _fresh(self, type_: Callable) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(type_)
+            if entry is None:
+                return None
+            self._entries.move_to_end(type_)
+            if not self._expired(entry):
+                return entry
+            if not self.background_refresh:
+                return None
+            if not entry.refreshing:
+                entry.refreshing = True
+                context = copy_context()
+                Thread(target=context.run, args=(self._refresh, type_),
+                       daemon=True).start()
+            return entry
+
+    def _store(self, type_: Callable, obj: Any) -> None:
+        evicted: List[Tuple[Callable, Any]] = []
+        with self._lock:
+            old = self._entries.pop(type_, None)
+            if old is not None:
+                evicted.append((type_, old.obj))
+            self._entries[type_] = _Entry(obj)
+            while (self.max_size is not None and
+                   len(self._entries) > self.max_size):
+                evicted_type, entry = self._entries.popitem(last=False)
+                evicted.append((evicted_type, entry.obj))
+
+        _run_disposals(
+            disposal
+            for evicted_type, evicted_obj in evicted
+            for disposal in (partial(self.dispose, evicted_obj),
+                             partial(_dispose, evicted_type, [evicted_obj])))
+
+    def _create(self, type_: Callable) -> Any:
+        # reentrant, so building the dependency chain in one thread
+        # never deadlocks on itself
+        with self._locks.setdefault(type_, RLock()):
+            with self._lock:
+                entry = self._entries.get(type_)
+                if (entry is not None and not entry.refreshing and
+                        not self._expired(entry)):
+                    return entry.obj
+
+            obj = type_()
+            self._store(type_, obj)
+            return obj
+
+    def _refresh(self, type_: Callable) -> None:
+        try:
+            self._create(type_)
+        finally:
+            with self._lock:
+                entry = self._entries.get(type_)
+                if entry is not None and self._expired(entry):
+                    # failed, the next call tries again
+                    entry.refreshing = False
+
+    def after_fork(self, unsafe: Collection[Callable]) -> None:
+        self._lock = Lock()
+        self._locks = {}
+        for type_ in [t for t in self._entries if t in unsafe]:
+            del self._entries[type_]
+        # refreshing threads don't exist in the child
+        for entry in self._entries.values():
+            entry.refreshing = False
+
+    def shutdown(self) -> List[Tuple[Callable, Any]]:
+        with self._lock:
+            entries = list(self._entries.items())
+            self._entries.clear()
+        return [(type_, entry.obj) for type_, entry in entries]
+
+    def get_object(self, type_: Callable) -> Any:
+        entry = self._fresh(type_)
+        if entry is not None:
+            return entry.obj
+        return self._create(type_)
+
+
+class TTLScope(CachingScope):
+    """
+    Dependencies within TTLScope are created again after `ttl` seconds.
+    """
+
+    ttl: Optional[float] = 300.0
+
+
+class LRUScope(CachingScope):
+    """
+    Dependencies within LRUScope are cached until there are more than
+    `max_size` of them, then the least recently used one is evicted.
+    """
+
+    max_size: Optional[int] = 128
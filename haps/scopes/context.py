@@ -0,0 +1,141 @@
+import inspect
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+from haps.exceptions import InactiveScope
+from haps.scopes import Scope, _arun_disposals, _disposal, _run_disposals
+
+_context_objects: 'ContextVar[Optional[Dict[Callable, Any]]]' = ContextVar(
+    'haps_context_scope', default=None)
+_context_callbacks: 'ContextVar[Optional[List[Callable]]]' = ContextVar(
+    'haps_context_scope_callbacks', default=None)
+
+
+def on_scope_exit(callback: Callable[[], Any]) -> None:
+    """
+    Register a callback called when the current context scope is closed.
+    Callbacks are called in the reverse order of registration.
+
+    :param callback: Callable without arguments
+    """
+    callbacks = _context_callbacks.get()
+    if callbacks is None:
+        raise InactiveScope('No context scope is active')
+    callbacks.append(callback)
+
+
+class ContextScope(Scope):
+    """
+    Dependencies within ContextScope are created only once per unit of
+    work (an HTTP request, an asyncio task, a job), opened with
+    :func:`~haps.scopes.context.context_scope`.
+
+    Unlike :class:`~haps.scopes.thread.ThreadScope` it's based on
+    :mod:`contextvars`, so it works with asyncio and thread pools.
+
+    Objects are disposed when the scope is closed, like
+    :meth:`~haps.Container.shutdown` disposes singletons, the ones created
+    last first.
+    """
+
+    thread_safe = True
+    async_factories = True
+
+    @staticmethod
+    def _current() -> Dict[Callable, Any]:
+        objects = _context_objects.get()
+        if objects is None:
+            raise InactiveScope('No context scope is active')
+        return objects
+
+    @staticmethod
+    def _store(objects: Dict[Callable, Any], type_: Callable,
+               obj: Any) -> None:
+        objects[type_] = obj
+        disposal = _disposal(type_, obj)
+        if disposal is not None:
+            on_scope_exit(disposal)
+
+    def get_object(self, type_: Callable) -> Any:
+        objects = self._current()
+        if type_ in objects:
+            return objects[type_]
+        else:
+            obj = type_()
+            self._store(objects, type_, obj)
+            return obj
+
+    async def aget_object(self, type_: Callable) -> Any:
+        objects = self._current()
+        if type_ in objects:
+            return objects[type_]
+        else:
+            obj = type_()
+            if inspect.isawaitable(obj):
+                obj = await obj
+            self._store(objects, type_, obj)
+            return obj
+
+
+class context_scope:
+    """
+    Opens a new context scope, can be used as a context manager or
+    a decorator (also for coroutine functions). Objects created within
+    the scope are disposed when it's closed, and callbacks registered with
+    :func:`~haps.scopes.context.on_scope_exit` are called.
+
+    Async disposals (and callbacks returning awaitables) are awaited by
+    `async with`, or run with :func:`asyncio.run` by `with`.
+
+    .. code-block:: python
+
+        with context_scope():
+            handle_request()
+
+        @context_scope()
+        async def handle_job(job):
+            ...
+    """
+
+    def __init__(self) -> None:
+        self._token = None
+        self._callbacks_token = None
+
+    def __enter__(self) -> 'context_scope':
+        self._token = _context_objects.set({})
+        self._callbacks_token = _context_callbacks.set([])
+        return self
+
+    def _close(self) -> List[Callable]:
+        callbacks = _context_callbacks.get()
+        _context_objects.get().clear()
+        _context_objects.reset(self._token)
+        _context_callbacks.reset(self._callbacks_token)
+        self._token = self._callbacks_token = None
+        return callbacks[::-1]
+
+    def __exit__(self, *exc_info) -> None:
+        _run_disposals(self._close())
+
+    async def __aenter__(self) -> 'context_scope':
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await _arun_disposals(self._close())
+
+    def __call__(self, fun: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fun):
+            @wraps(fun)
+            async def _ainner(*args, **kwargs):
+                async with context_scope():
+                    return await fun(*args, **kwargs)
+
+            return _ainner
+
+        @wraps(fun)
+        def _inner(*args, **kwargs):
+            with context_scope():
+                return fun(*args, **kwargs)
+
+        return _inner
@@ -8,5 +8,8 @@ class InstanceScope(Scope):
     Dependencies within InstanceScope are created at every injection.
     """
 
+    thread_safe = True
+    async_factories = True
+
     def get_object(self, type_: Callable) -> Any:
         return type_()
@@ -0,0 +1,272 @@
+from collections import deque
+from contextlib import contextmanager
+from functools import partial
+from threading import Condition, Lock, get_ident
+from time import monotonic
+from typing import (Any, Callable, Collection, Deque, Dict, Iterator, List,
+                    Optional, Tuple, Type)
+
+from haps.exceptions import CallError, InactiveScope, PoolExhausted
+from haps.scopes import Scope, _dispose
+from haps.scopes.context import ContextScope, on_scope_exit
+
+
+class _Pool:
+    __slots__ = ('condition', 'idle', 'size', 'owners', 'held')
+
+    def __init__(self) -> None:
+        self.condition = Condition(Lock())
+        # (object, release time), the most recently released on the right
+        self.idle: Deque[Tuple[Any, float]] = deque()
+        # all objects created by the pool, idle and checked out
+        self.size = 0
+        # threads holding checked out objects, by object id, and the number
+        # of objects held by every thread
+        self.owners: Dict[int, int] = {}
+        self.held: Dict[int, int] = {}
+
+    def hold(self, obj: Any) -> None:
+        thread = get_ident()
+        self.owners[id(obj)] = thread
+        self.held[thread] = self.held.get(thread, 0) + 1
+
+    def unhold(self, obj: Any) -> None:
+        thread = self.owners.pop(id(obj), None)
+        if thread is None:
+            return
+        if self.held[thread] == 1:
+            del self.held[thread]
+        else:
+            self.held[thread] -= 1
+
+
+class PoolScope(Scope):
+    """
+    Dependencies within PoolScope are reused, but never shared: every
+    :func:`~haps.scopes.context.context_scope` checks out its own object
+    from a pool at the first injection, and returns it to the pool when
+    it's closed. Useful for expensive objects which aren't thread safe.
+
+    Objects can be also checked out explicitly with
+    :func:`~haps.scopes.pool.pooled`.
+
+    Objects dropped from the pool (idle for too long, or failing `reset`)
+    are disposed like :meth:`~haps.Container.shutdown` disposes them.
+
+    Pool parameters are class attributes, so they are configured by
+    subclassing:
+
+    .. code-block:: python
+
+        class ParserPool(PoolScope):
+            max_size = 4
+
+            def reset(self, obj):
+                obj.clear()
+
+        Container().register_scope('parsers', ParserPool)
+    """
+
+    thread_safe = True
+
+    #: Number of idle objects kept despite `idle_timeout`
+    min_size = 0
+    #: Maximum number of objects of one dependency
+    max_size = 8
+    #: Seconds after which an idle object is dropped, `None` to keep it
+    idle_timeout: Optional[float] = 60.0
+    #: Seconds to wait for a free object, `None` to wait forever
+    timeout: Optional[float] = None
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._pools: Dict[Callable, _Pool] = {}
+
+    def reset(self, obj: Any) -> None:
+        """
+        Called when an object is returned to the pool, to clean its state.
+        If it raises, the object is dropped instead.
+
+        :param obj: Returned object
+        """
+
+    def _pool(self, type_: Callable) -> _Pool:
+        try:
+            return self._pools[type_]
+        except KeyError:
+            with self._lock:
+                return self._pools.setdefault(type_, _Pool())
+
+    def _evict(self, pool: _Pool) -> List[Any]:
+        evicted: List[Any] = []
+        if self.idle_timeout is None:
+            return evicted
+        expired = monotonic() - self.idle_timeout
+        while (pool.idle and pool.size > self.min_size and
+               pool.idle[0][1] <= expired):
+            evicted.append(pool.idle.popleft()[0])
+            pool.size -= 1
+        return evicted
+
+    def _drop(self, pool: _Pool, obj: Any = None) -> None:
+        with pool.condition:
+            pool.size -= 1
+            pool.unhold(obj)
+            pool.condition.notify()
+
+    def acquire(self, type_: Callable) -> Any:
+        """
+        Checks out an object, creating it if there is no idle one. Waits
+        up to `timeout` if the pool is full, then raises
+        :class:`~haps.exceptions.PoolExhausted`. It's raised right away
+        if all objects are held by the current thread, since waiting would
+        never end.
+
+        :param type_: Factory of the dependency
+        :return: Object which should be returned with
+            :meth:`~haps.scopes.pool.PoolScope.release`
+        """
+        pool = self._pool(type_)
+        # disposed before anything is checked out, so a failing disposal
+        # can't leak the checked out object
+        with pool.condition:
+            evicted = self._evict(pool)
+        _dispose(type_, evicted)
+
+        timeout = self.timeout
+        deadline = None if timeout is None else monotonic() + timeout
+        with pool.condition:
+            while not pool.idle and pool.size >= self.max_size:
+                if pool.held.get(get_ident(), 0) >= pool.size:
+                    raise PoolExhausted(
+                        f'All objects in the pool of {type_!r} are held '
+                        f'by the current thread')
+                if deadline is None:
+                    pool.condition.wait()
+                    continue
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    raise PoolExhausted(
+                        f'No free object in the pool of {type_!r}')
+                pool.condition.wait(remaining)
+
+            if pool.idle:
+                obj = pool.idle.pop()[0]
+                pool.hold(obj)
+                return obj
+            pool.size += 1
+
+        try:
+            obj = type_()
+        except BaseException:
+            self._drop(pool)
+            raise
+
+        with pool.condition:
+            pool.hold(obj)
+        return obj
+
+    def release(self, type_: Callable, obj: Any) -> None:
+        """
+        Returns a checked out object to the pool.
+
+        :param type_: Factory of the dependency
+        :param obj: Object returned by
+            :meth:`~haps.scopes.pool.PoolScope.acquire`
+        """
+        pool = self._pools[type_]
+        try:
+            self.reset(obj)
+        except BaseException:
+            self._drop(pool, obj)
+            _dispose(type_, [obj])
+            raise
+
+        with pool.condition:
+            pool.unhold(obj)
+            pool.idle.append((obj, monotonic()))
+            evicted = self._evict(pool)
+            pool.condition.notify()
+        _dispose(type_, evicted)
+
+    @contextmanager
+    def checkout(self, type_: Callable) -> Iterator[Any]:
+        """
+        Context manager checking out an object for the duration of
+        the block.
+
+        :param type_: Factory of the dependency
+        """
+        obj = self.acquire(type_)
+        try:
+            yield obj
+        finally:
+            self.release(type_, obj)
+
+    def after_fork(self, unsafe: Collection[Callable]) -> None:
+        # objects checked out by other threads are never returned, only
+        # the idle ones are counted
+        self._lock = Lock()
+        for type_, pool in self._pools.items():
+            pool.condition = Condition(Lock())
+            if type_ in unsafe:
+                pool.idle.clear()
+            pool.size = len(pool.idle)
+            pool.owners.clear()
+            pool.held.clear()
+
+    def shutdown(self) -> List[Tuple[Callable, Any]]:
+        # checked out objects are still in use, they are disposed by
+        # the next shutdown after they are returned
+        objects = []
+        with self._lock:
+            pools = list(self._pools.items())
+        for type_, pool in pools:
+            with pool.condition:
+                objects.extend((type_, obj) for obj, _ in pool.idle)
+                pool.size -= len(pool.idle)
+                pool.idle.clear()
+        return objects
+
+    def get_object(self, type_: Callable) -> Any:
+        try:
+            objects = ContextScope._current()
+        except InactiveScope:
+            raise InactiveScope(
+                'Pooled dependencies are injected within a context scope, '
+                'use pooled() outside of it') from None
+
+        # one object per context scope, so injections can't exhaust
+        # the pool on their own
+        key = (self, type_)
+        if key in objects:
+            return objects[key]
+
+        obj = self.acquire(type_)
+        objects[key] = obj
+        on_scope_exit(partial(self.release, type_, obj))
+        return obj
+
+
+@contextmanager
+def pooled(base_: Type, qualifier: str = None) -> Iterator[Any]:
+    """
+    Context manager checking out a :class:`~haps.scopes.pool.PoolScope`
+    dependency for the duration of the block.
+
+    .. code-block:: python
+
+        with pooled(IParser) as parser:
+            parser.feed(data)
+
+    :param base_: `base` of the dependency
+    :param qualifier: optional qualifier
+    """
+    # imported lazily, haps.container imports the scopes
+    from haps.container import Container
+
+    egg_, scope = Container()._lookup(base_, qualifier)
+    if not isinstance(scope, PoolScope):
+        raise CallError(f'Dependency {base_!r} is not pooled')
+    with scope.checkout(egg_.egg) as obj:
+        yield obj
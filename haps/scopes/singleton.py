@@ -1,20 +1,100 @@
-from typing import Any, Callable
+from threading import Lock, RLock
+from typing import Any, Callable, Collection, Dict, List, Tuple
 
 from haps.scopes import Scope
 
+_EMPTY = object()
+
 
 class SingletonScope(Scope):
     """
     Dependencies within SingletonScope are created only once in
     the application context.
+
+    Objects are kept in a list, every dependency gets its own slot, so
+    providers bound with :meth:`~haps.scopes.Scope.bind` read them
+    without hashing the factory.
+
+    Creation is guarded by a separate lock for every dependency, so a slow
+    constructor blocks only the threads waiting for the same dependency.
     """
 
-    _objects = {}
+    thread_safe = True
+    locks_creation = True
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._slots: Dict[Callable, int] = {}
+        self._factories: List[Callable] = []
+        self._objects: List[Any] = []
+        self._locks: List[RLock] = []
+        # slots in creation order, for shutdown
+        self._created: List[int] = []
+
+    def _slot(self, type_: Callable) -> int:
+        try:
+            return self._slots[type_]
+        except KeyError:
+            with self._lock:
+                if type_ not in self._slots:
+                    # the slot is published after it's ready
+                    self._factories.append(type_)
+                    self._objects.append(_EMPTY)
+                    self._locks.append(RLock())
+                    self._slots[type_] = len(self._objects) - 1
+                return self._slots[type_]
+
+    def _create(self, slot: int, type_: Callable) -> Any:
+        # reentrant, so building the dependency chain in one thread
+        # never deadlocks on itself
+        with self._locks[slot]:
+            obj = self._objects[slot]
+            if obj is _EMPTY:
+                obj = type_()
+                self._objects[slot] = obj
+                with self._lock:
+                    self._created.append(slot)
+            return obj
 
     def get_object(self, type_: Callable) -> Any:
-        if type_ in self._objects:
-            return self._objects[type_]
-        else:
-            obj = type_()
-            self._objects[type_] = obj
+        slot = self._slot(type_)
+        obj = self._objects[slot]
+        if obj is not _EMPTY:
             return obj
+        return self._create(slot, type_)
+
+    def bind(self, type_: Callable) -> Callable[[], Any]:
+        slot = self._slot(type_)
+        objects = self._objects
+        create = self._create
+
+        def provider() -> Any:
+            obj = objects[slot]
+            if obj is not _EMPTY:
+                return obj
+            return create(slot, type_)
+
+        return provider
+
+    def after_fork(self, unsafe: Collection[Callable]) -> None:
+        self._lock = Lock()
+        # in place, bound providers keep references to the lists
+        self._locks[:] = [RLock() for _ in self._locks]
+        for slot, type_ in enumerate(self._factories):
+            if type_ in unsafe:
+                self._objects[slot] = _EMPTY
+        self._created[:] = [slot for slot in self._created
+                            if self._objects[slot] is not _EMPTY]
+
+    def shutdown(self) -> List[Tuple[Callable, Any]]:
+        objects = []
+        with self._lock:
+            created = self._created[:]
+            self._created.clear()
+        for slot in created:
+            with self._locks[slot]:
+                obj = self._objects[slot]
+                if obj is not _EMPTY:
+                    objects.append((self._factories[slot], obj))
+                    self._objects[slot] = _EMPTY
+        return objects
@@ -1,5 +1,5 @@
-from threading import local
-from typing import Any, Callable
+from threading import Lock, local
+from typing import Any, Callable, Collection, Dict, List, Tuple
 
 from haps.scopes import Scope
 
@@ -10,7 +10,13 @@ class ThreadScope(Scope):
     context.
     """
 
-    _thread_local = local()
+    thread_safe = True
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._thread_local = local()
+        # objects of all threads, so they can be disposed on shutdown
+        self._all_objects: List[Dict[Callable, Any]] = []
 
     def get_object(self, type_: Callable) -> Any:
         try:
@@ -18,6 +24,8 @@ class ThreadScope(Scope):
         except AttributeError:
             objects = {}
             self._thread_local.objects = objects
+            with self._lock:
+                self._all_objects.append(objects)
 
         if type_ in objects:
             return objects[type_]
@@ -25,3 +33,20 @@ class ThreadScope(Scope):
             obj = type_()
             objects[type_] = obj
             return obj
+
+    def after_fork(self, unsafe: Collection[Callable]) -> None:
+        # only the forking thread exists in the child
+        self._lock = Lock()
+        objects = getattr(self._thread_local, 'objects', None)
+        self._all_objects = [] if objects is None else [objects]
+        for type_ in [t for t in objects or () if t in unsafe]:
+            del objects[type_]
+
+    def shutdown(self) -> List[Tuple[Callable, Any]]:
+        # threads start over with new dictionaries
+        with self._lock:
+            all_objects = self._all_objects
+            self._all_objects = []
+            self._thread_local = local()
+
+        return [item for objects in all_objects for item in objects.items()]
@@ -18,10 +18,13 @@ setup(
     long_description_content_type='text/markdown',
     long_description=readme(),
     platforms='any',
+    python_requires='>=3.7',
+    entry_points={
+        'console_scripts': ['haps-manifest=haps.manifest:main'],
+    },
     classifiers=[
         "License :: OSI Approved :: MIT License",
         "Programming Language :: Python",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
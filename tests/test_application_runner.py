@@ -1,4 +1,4 @@
-from haps import Inject
+from haps import Container, Inject
 from haps.application import Application, ApplicationRunner
 
 
@@ -29,3 +29,16 @@ def test_application_with_autodiscovery():
     ApplicationRunner.run(
         App, extra_module_paths=['samples.autodiscover.services'])
     assert App.ran
+
+
+def test_application_shutdown(monkeypatch):
+    calls = []
+    monkeypatch.setattr(Container, 'shutdown',
+                        lambda self: calls.append('shutdown'))
+
+    class App(Application):
+        def run(self) -> None:
+            calls.append('run')
+
+    ApplicationRunner.run(App)
+    assert calls == ['run', 'shutdown']
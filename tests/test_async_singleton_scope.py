@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from haps.exceptions import CallError
+from haps.scopes.async_singleton import AsyncSingletonScope
+
+
+def test_get_object(some_class):
+    scope = AsyncSingletonScope()
+    some_instance = asyncio.run(scope.aget_object(some_class))
+    assert isinstance(some_instance, some_class)
+    assert scope.get_object(some_class) is some_instance
+
+
+def test_get_object_not_created(some_class):
+    with pytest.raises(CallError):
+        AsyncSingletonScope().get_object(some_class)
+
+
+def test_concurrent_creation(some_class):
+    created = []
+
+    async def factory():
+        await asyncio.sleep(0.01)
+        obj = some_class()
+        created.append(obj)
+        return obj
+
+    async def main():
+        scope = AsyncSingletonScope()
+        return await asyncio.gather(
+            *(scope.aget_object(factory) for _ in range(10)))
+
+    objects = asyncio.run(main())
+
+    assert len(created) == 1
+    assert all(o is created[0] for o in objects)
+
+
+def test_failed_creation_is_retried(some_class):
+    attempts = []
+
+    async def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError
+        return some_class()
+
+    async def main():
+        scope = AsyncSingletonScope()
+        with pytest.raises(RuntimeError):
+            await scope.aget_object(factory)
+        return await scope.aget_object(factory)
+
+    assert isinstance(asyncio.run(main()), some_class)
+    assert len(attempts) == 2
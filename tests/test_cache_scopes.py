@@ -0,0 +1,83 @@
+from threading import Event
+
+from haps.scopes.cache import LRUScope, TTLScope
+
+
+def test_cached_until_expired(some_class):
+    disposed = []
+
+    class Scope(TTLScope):
+        def dispose(self, obj):
+            disposed.append(obj)
+
+    scope = Scope()
+    first = scope.get_object(some_class)
+    assert scope.get_object(some_class) is first
+
+    Scope.ttl = 0
+    second = scope.get_object(some_class)
+    assert second is not first
+    assert disposed == [first]
+
+
+def test_least_recently_used_evicted(some_class, some_class2):
+    disposed = []
+
+    class Scope(LRUScope):
+        max_size = 1
+
+        def dispose(self, obj):
+            disposed.append(obj)
+
+    scope = Scope()
+    first = scope.get_object(some_class)
+    assert scope.get_object(some_class) is first
+    other = scope.get_object(some_class2)
+
+    assert disposed == [first]
+    assert scope.get_object(some_class2) is other
+    assert scope.get_object(some_class) is not first
+    assert disposed == [first, other]
+
+
+def test_expired_objects_disposed():
+    exited = []
+
+    class Client:
+        def __exit__(self, *exc_info):
+            exited.append(self)
+
+    class Scope(TTLScope):
+        ttl = 0
+
+    scope = Scope()
+    first = scope.get_object(Client)
+    second = scope.get_object(Client)
+    assert second is not first
+    assert exited == [first]
+
+
+def test_background_refresh():
+    created = Event()
+    release = Event()
+
+    class Slow:
+        instances = 0
+
+        def __init__(self):
+            Slow.instances += 1
+            if Slow.instances > 1:
+                release.wait()
+                created.set()
+
+    class Scope(TTLScope):
+        ttl = 0
+        background_refresh = True
+
+    scope = Scope()
+    first = scope.get_object(Slow)
+    # expired, returned while the new object is created in the background
+    assert scope.get_object(Slow) is first
+    assert scope.get_object(Slow) is first
+    release.set()
+    assert created.wait(1)
@@ -1,6 +1,7 @@
 import pytest
 
 from haps.config import Config, Configuration
+from haps.exceptions import ConfigurationError, UnknownConfigVariable
 
 
 @pytest.fixture
@@ -63,3 +64,85 @@ def test_configuration_chaining():
     assert Configuration().get_var('b') == 2
     assert Configuration().get_var('c') == 3
     assert Configuration().get_var('d', None) is None
+
+
+def test_frozen_config(monkeypatch):
+    monkeypatch.setenv('HAPS_port', '8080')
+    monkeypatch.setenv('HAPS_debug', 'yes')
+    monkeypatch.setenv('HAPS_ratio', 'x')
+    Configuration.env_resolver('port')
+    Configuration.env_resolver('debug')
+    Configuration.env_resolver('ratio')
+    Configuration.env_resolver('missing')
+    Configuration.set('name', 'haps')
+    Configuration.freeze()
+
+    class SomeClass:
+        port: int = Config()
+        debug: bool = Config()
+        ratio: float = Config()
+        name: str = Config()
+        other: int = Config('missing', default=1)
+
+    sc = SomeClass()
+
+    assert sc.port == 8080
+    assert sc.debug is True
+    assert sc.name == 'haps'
+    assert sc.other == 1
+    assert vars(sc) == {'port': 8080, 'debug': True, 'name': 'haps',
+                        'other': 1}
+    with pytest.raises(ConfigurationError):
+        sc.ratio
+
+    assert Configuration().get_var('port') == '8080'
+    with pytest.raises(UnknownConfigVariable):
+        Configuration().get_var('missing')
+    with pytest.raises(ConfigurationError):
+        Configuration.set('new_name', 'other')
+    with pytest.raises(ConfigurationError):
+        Configuration.env_resolver('new')
+
+
+@pytest.mark.parametrize('name,content', [
+    ('settings.json', '{"port": "1", "debug": true, "db": {"host": "h"}}'),
+    ('settings.ini', 'port = 1\ndebug = on\n[db]\nhost = h\n'),
+])
+def test_load(tmp_path, monkeypatch, name, content):
+    path = tmp_path / name
+    path.write_text(content)
+    monkeypatch.setenv('HAPS_port', '2')
+    monkeypatch.setenv('HAPS_extra', 'e')
+    Configuration.set('debug', False)
+    Configuration.env_resolver('extra')
+
+    report = Configuration.load(str(path), types={'port': int, 'debug': bool})
+
+    assert sorted(report.loaded) == ['db.host', 'extra', 'port']
+    assert report.unknown == ('db.host',)
+    assert report.unused == ('debug',)
+    assert Configuration().get_var('port') == 2
+    assert Configuration().get_var('debug') is False
+    assert Configuration().get_var('db.host') == 'h'
+    assert Configuration().get_var('extra') == 'e'
+
+
+def test_load_is_atomic(monkeypatch):
+    monkeypatch.setenv('HAPS_good', '1')
+    monkeypatch.setenv('HAPS_bad', 'x')
+
+    with pytest.raises(ConfigurationError):
+        Configuration.load(types={'good': int, 'bad': int})
+
+    assert Configuration().cache == {}
+
+
+def test_load_toml(tmp_path):
+    pytest.importorskip('tomllib')
+    path = tmp_path / 'settings.toml'
+    path.write_text('port = 1\n[haps]\nprofiles = ["test"]\n')
+
+    report = Configuration.load(str(path), env_prefix='HAPS_TEST_')
+
+    assert sorted(report.loaded) == ['haps.profiles', 'port']
+    assert Configuration().get_var('haps.profiles') == ['test']
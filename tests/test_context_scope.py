@@ -0,0 +1,115 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import haps
+from haps.exceptions import InactiveScope
+from haps.scopes.context import ContextScope, context_scope, on_scope_exit
+
+
+def test_get_object(some_class):
+    with context_scope():
+        some_instance = ContextScope().get_object(some_class)
+    assert isinstance(some_instance, some_class)
+
+
+def test_inactive_scope(some_class):
+    with pytest.raises(InactiveScope):
+        ContextScope().get_object(some_class)
+
+
+def test_objects_cached_within_scope(some_class):
+    scope = ContextScope()
+    with context_scope():
+        first = {scope.get_object(some_class) for _ in range(10)}
+    with context_scope():
+        second = {scope.get_object(some_class) for _ in range(10)}
+
+    assert len(first) == 1
+    assert len(second) == 1
+    assert first != second
+
+
+def test_decorator_in_thread_pool(some_class):
+    scope = ContextScope()
+
+    @context_scope()
+    def job(_):
+        return scope.get_object(some_class), scope.get_object(some_class)
+
+    with ThreadPoolExecutor(2) as pool:
+        results = list(pool.map(job, range(10)))
+
+    assert all(a is b for a, b in results)
+    assert len({id(a) for a, _ in results}) == 10
+
+
+def test_asyncio_tasks(some_class):
+    scope = ContextScope()
+
+    @context_scope()
+    async def task():
+        obj = scope.get_object(some_class)
+        await asyncio.sleep(0)
+        assert scope.get_object(some_class) is obj
+        return obj
+
+    async def main():
+        return await asyncio.gather(*(task() for _ in range(10)))
+
+    objects = asyncio.run(main())
+    assert len({id(o) for o in objects}) == 10
+
+
+def test_exit_callbacks():
+    calls = []
+    with context_scope():
+        on_scope_exit(lambda: calls.append(1))
+        on_scope_exit(lambda: calls.append(2))
+        assert not calls
+    assert calls == [2, 1]
+
+    with pytest.raises(InactiveScope):
+        on_scope_exit(lambda: None)
+
+
+def test_objects_disposed_on_exit(some_class, some_class2):
+    disposed = []
+
+    class Session:
+        def __exit__(self, *exc_info):
+            disposed.append(self)
+
+    @haps.scope('context')
+    class Client(some_class2):
+        pass
+
+    haps.Container.configure([
+        haps.Egg(some_class2, Client, None, Client, dispose=disposed.append)
+    ])
+    haps.Container().register_scope('context', ContextScope)
+
+    scope = ContextScope()
+    with context_scope():
+        session = scope.get_object(Session)
+        client = haps.Container().get_object(some_class2)
+        assert not disposed
+    # the ones created last first
+    assert disposed == [client, session]
+
+
+def test_async_disposal():
+    disposed = []
+
+    class Session:
+        async def __aexit__(self, *exc_info):
+            disposed.append(self)
+
+    scope = ContextScope()
+
+    @context_scope()
+    async def handle():
+        return scope.get_object(Session)
+
+    assert disposed == [asyncio.run(handle())]
@@ -1,3 +1,8 @@
+import asyncio
+import os
+import threading
+from typing import Dict, List
+
 import pytest
 
 import haps
@@ -251,3 +256,721 @@ def test_dependencies_with_profiles(some_class, profiles, expected):
     some_instance = AnotherClass()
 
     assert type(some_instance.some_instance).__name__ == expected
+
+
+def test_inject_plan_invalidated_by_reset(some_class):
+    class NewClass(some_class):
+        pass
+
+    class NewClass2(some_class):
+        pass
+
+    @haps.inject
+    def func(dep: some_class):
+        return dep
+
+    haps.Container.configure([
+        haps.Egg(some_class, NewClass, None, NewClass)
+    ])
+    assert isinstance(func(), NewClass)
+
+    haps.Container._reset()
+    haps.Container.configure([
+        haps.Egg(some_class, NewClass2, None, NewClass2)
+    ])
+    assert isinstance(func(), NewClass2)
+
+
+def test_slow_singleton_does_not_block_other_dependencies(some_class):
+    started = threading.Event()
+    release = threading.Event()
+
+    @haps.scope(haps.SINGLETON_SCOPE)
+    class Slow:
+        def __init__(self):
+            started.set()
+            release.wait(5)
+
+    haps.Container.configure([
+        haps.Egg(Slow, Slow, None, Slow),
+        haps.Egg(some_class, some_class, None, some_class)
+    ])
+
+    resolved = []
+    slow = threading.Thread(target=haps.Container().get_object, args=(Slow,))
+    fast = threading.Thread(
+        target=lambda: resolved.append(
+            haps.Container().get_object(some_class)))
+    slow.start()
+    try:
+        assert started.wait(5)
+        fast.start()
+        fast.join(2)
+        assert resolved and isinstance(resolved[0], some_class)
+    finally:
+        release.set()
+        slow.join()
+        fast.join()
+
+
+def test_singleton_with_custom_scope_does_not_deadlock():
+    class CustomScope(haps.scopes.Scope):
+        def get_object(self, type_):
+            return type_()
+
+    singleton_started = threading.Event()
+    custom_started = threading.Event()
+
+    @haps.scope('custom')
+    class Custom:
+        pass
+
+    @haps.scope(haps.SINGLETON_SCOPE)
+    class Singleton:
+        def __init__(self):
+            singleton_started.set()
+            custom_started.wait(0.5)
+            haps.Container().get_object(Custom)
+
+    @haps.scope('custom')
+    class Custom2:
+        def __init__(self):
+            custom_started.set()
+            singleton_started.wait(0.5)
+            haps.Container().get_object(Singleton)
+
+    haps.Container.configure([
+        haps.Egg(Singleton, Singleton, None, Singleton),
+        haps.Egg(Custom, Custom, None, Custom),
+        haps.Egg(Custom2, Custom2, None, Custom2),
+    ])
+    haps.Container().register_scope('custom', CustomScope)
+
+    threads = [
+        threading.Thread(target=haps.Container().get_object, args=(base_,),
+                         daemon=True)
+        for base_ in (Singleton, Custom2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert not any(thread.is_alive() for thread in threads)
+
+
+def test_async_factory_and_inject(some_class):
+    @haps.scope(haps.ASYNC_SINGLETON_SCOPE)
+    async def factory() -> some_class:
+        await asyncio.sleep(0)
+        return some_class()
+
+    haps.Container.configure([
+        haps.Egg(some_class, some_class, None, factory)
+    ])
+
+    @haps.inject
+    async def func(dep: some_class):
+        return dep
+
+    async def main():
+        return (await haps.Container().aget_object(some_class),
+                await func())
+
+    direct, injected = asyncio.run(main())
+
+    assert isinstance(direct, some_class)
+    assert injected is direct
+
+
+def test_async_factory_in_singleton_scope_is_rejected(some_class):
+    @haps.scope(haps.SINGLETON_SCOPE)
+    async def factory() -> some_class:
+        return some_class()
+
+    haps.Container.configure([
+        haps.Egg(some_class, some_class, None, factory)
+    ])
+
+    with pytest.raises(exceptions.CallError):
+        asyncio.run(haps.Container().aget_object(some_class))
+    with pytest.raises(exceptions.CallError):
+        haps.Container().get_object(some_class)
+
+
+def test_aget_object_locks_scopes_which_are_not_thread_safe(some_class):
+    locked = []
+
+    def try_lock():
+        # from another thread, RLock doesn't tell if it's held
+        acquired = haps.Container._lock.acquire(blocking=False)
+        if acquired:
+            haps.Container._lock.release()
+        locked.append(not acquired)
+
+    class CustomScope(haps.scopes.Scope):
+        def get_object(self, type_):
+            thread = threading.Thread(target=try_lock)
+            thread.start()
+            thread.join()
+            return type_()
+
+    @haps.scope('custom')
+    class Custom(some_class):
+        pass
+
+    haps.Container.configure([haps.Egg(some_class, Custom, None, Custom)])
+    haps.Container().register_scope('custom', CustomScope)
+
+    obj = asyncio.run(haps.Container().aget_object(some_class))
+    assert isinstance(obj, Custom)
+    assert locked == [True]
+
+
+def test_parallel_autodiscovery():
+    from samples.autodiscover.sample import CoffeeMaker, IHeater, IPump
+    haps.Container.autodiscover(['samples.autodiscover.services'],
+                                parallel=True, max_workers=4)
+
+    cm = CoffeeMaker()
+    assert isinstance(cm.pump, IPump)
+    assert isinstance(cm.heater, IHeater)
+
+
+PARALLEL_MODULE = '''
+import time
+from haps import egg
+from {pkg}.bases import IBase
+
+time.sleep({delay})
+
+
+@egg('{name}')
+class Impl(IBase):
+    pass
+'''
+
+
+def test_parallel_autodiscovery_order(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(haps.egg, 'factories', [])
+
+    for pkg in ('seq_pkg', 'par_pkg'):
+        root = tmp_path / pkg
+        (root / 'sub').mkdir(parents=True)
+        (root / '__init__.py').write_text('')
+        (root / 'sub' / '__init__.py').write_text('')
+        (root / 'bases.py').write_text(
+            'from haps import base\n\n\n@base\nclass IBase:\n    pass\n')
+        for i, parent in enumerate([root] * 4 + [root / 'sub'] * 4):
+            (parent / f'm{i}.py').write_text(PARALLEL_MODULE.format(
+                pkg=pkg, delay=(8 - i) / 1000, name=f'q{i}'))
+        # eggs of z are registered in the middle of a
+        (root / 'a.py').write_text(
+            f'from haps import egg\n'
+            f'from {pkg}.bases import IBase\n\n\n'
+            f'@egg("a1")\n'
+            f'class A1(IBase):\n'
+            f'    pass\n\n\n'
+            f'import {pkg}.z  # noqa\n\n\n'
+            f'@egg("a2")\n'
+            f'class A2(IBase):\n'
+            f'    pass\n')
+        (root / 'z.py').write_text(
+            f'from haps import egg\n'
+            f'from {pkg}.bases import IBase\n\n\n'
+            f'@egg("z")\n'
+            f'class Z(IBase):\n'
+            f'    pass\n')
+
+    haps.Container.autodiscover(['seq_pkg'])
+    sequential = [e.qualifier for e in haps.Container().config]
+    haps.Container._reset()
+    haps.egg.factories.clear()
+    haps.Container.autodiscover(['par_pkg'], parallel=True)
+    parallel = [e.qualifier for e in haps.Container().config]
+
+    assert len(sequential) == 11
+    assert sequential[:3] == ['a1', 'z', 'a2']
+    assert parallel == sequential
+
+
+@pytest.mark.parametrize('parallel', [False, True])
+def test_prewarm(some_class, parallel):
+    created = []
+
+    @haps.scope(haps.SINGLETON_SCOPE)
+    class Singleton:
+        @haps.inject
+        def __init__(self, dep: some_class):
+            created.append(self)
+
+    class NotCreated(some_class):
+        def __init__(self):
+            created.append(self)
+
+    haps.Container.configure([
+        haps.Egg(Singleton, Singleton, None, Singleton),
+        haps.Egg(some_class, NotCreated, None, NotCreated)
+    ])
+    haps.Container().prewarm(parallel=parallel)
+
+    assert len(created) == 2
+    assert isinstance(created[0], NotCreated)
+    assert haps.Container().get_object(Singleton) is created[1]
+
+
+def test_child_container(some_class, some_class2):
+    class Override(some_class):
+        pass
+
+    @haps.scope(haps.SINGLETON_SCOPE)
+    class Shared(some_class2):
+        @haps.inject
+        def __init__(self, dep: some_class):
+            self.dep = dep
+
+    class Handler:
+        shared: some_class2 = haps.Inject()
+
+        @haps.inject
+        def __init__(self, dep: some_class):
+            self.dep = dep
+
+    haps.Container.configure([
+        haps.Egg(some_class, some_class, None, some_class),
+        haps.Egg(some_class2, Shared, None, Shared)
+    ])
+    parent = haps.Container()
+    child = parent.child([haps.Egg(some_class, Override, None, Override)])
+
+    assert type(child.get_object(some_class)) is Override
+    assert type(parent.get_object(some_class)) is some_class
+
+    with child.activate():
+        assert haps.Container() is child
+        handler = Handler()
+        assert type(handler.dep) is Override
+        # singletons are shared with the parent and don't see overrides
+        assert handler.shared is parent.get_object(some_class2)
+        assert type(handler.shared.dep) is some_class
+
+    assert haps.Container() is parent
+    assert type(Handler().dep) is some_class
+
+
+def test_child_container_async(some_class, some_class2):
+    class Override(some_class):
+        pass
+
+    @haps.scope(haps.SINGLETON_SCOPE)
+    class Shared(some_class2):
+        @haps.inject
+        def __init__(self, dep: some_class):
+            self.dep = dep
+
+    @haps.inject
+    async def handler(dep: some_class, shared: some_class2):
+        return dep, shared
+
+    haps.Container.configure([
+        haps.Egg(some_class, some_class, None, some_class),
+        haps.Egg(some_class2, Shared, None, Shared)
+    ])
+    parent = haps.Container()
+    child = parent.child([haps.Egg(some_class, Override, None, Override)])
+
+    async def main():
+        with child.activate():
+            return await handler()
+
+    dep, shared = asyncio.run(main())
+    assert type(dep) is Override
+    # singletons are shared with the parent and don't see overrides
+    assert shared is parent.get_object(some_class2)
+    assert type(shared.dep) is some_class
+    assert asyncio.run(child.aget_object(some_class2)) is shared
+
+
+def test_inject_property_stored_in_instance(some_class):
+    haps.Container.configure([
+        haps.Egg(some_class, some_class, None, some_class)
+    ])
+
+    class AnotherClass:
+        dep: some_class = haps.Inject()
+
+    instance = AnotherClass()
+    dep = instance.dep
+
+    assert vars(instance) == {'dep': dep}
+    assert instance.dep is dep
+
+
+def test_inject_property_with_slots(some_class):
+    haps.Container.configure([
+        haps.Egg(some_class, some_class, None, some_class)
+    ])
+
+    class Slotted:
+        __slots__ = ('_dep',)
+        dep: some_class = haps.Inject(slot='_dep')
+
+    instance = Slotted()
+
+    assert isinstance(instance.dep, some_class)
+    assert instance.dep is instance._dep
+
+    # errors in __set_name__ are wrapped in RuntimeError before Python 3.12
+    with pytest.raises((TypeError, RuntimeError)):
+        class NoSlot:
+            __slots__ = ()
+            dep: some_class = haps.Inject()
+
+
+def test_generated_constructor(some_class, some_class2):
+    class Override(some_class):
+        pass
+
+    class Dependent(some_class2):
+        @haps.inject
+        def __init__(self, dep: some_class, other: some_class = None):
+            self.dep = dep
+            self.other = other
+
+    haps.Container.configure([
+        haps.Egg(some_class, some_class, None, some_class),
+        haps.Egg(some_class2, Dependent, None, Dependent)
+    ])
+    container = haps.Container()
+
+    assert container._provider(some_class2).__name__ == 'create_Dependent'
+    instance = container.get_object(some_class2)
+    assert type(instance) is Dependent
+    assert type(instance.dep) is some_class
+    assert type(instance.other) is some_class
+    assert instance.dep is not instance.other
+
+    child = container.child([haps.Egg(some_class, Override, None, Override)])
+    assert type(child.get_object(some_class2).dep) is Override
+
+
+def test_shutdown(some_class, some_class2):
+    disposed = []
+
+    @haps.scope(haps.SINGLETON_SCOPE)
+    class Resource(some_class):
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            disposed.append(self)
+
+    @haps.scope(haps.SINGLETON_SCOPE)
+    class Client(some_class2):
+        @haps.inject
+        def __init__(self, resource: some_class):
+            self.resource = resource
+
+    haps.Container.configure([
+        haps.Egg(some_class, Resource, None, Resource),
+        haps.Egg(some_class2, Client, None, Client,
+                 dispose=disposed.append)
+    ])
+    container = haps.Container()
+    client = container.get_object(some_class2)
+
+    container.shutdown()
+    # dependent objects are disposed first
+    assert disposed == [client, client.resource]
+
+    assert container.get_object(some_class2) is not client
+    container.shutdown()
+    assert len(disposed) == 4
+
+    client = container.get_object(some_class2)
+    container.child().shutdown()
+    assert len(disposed) == 4
+    assert container.get_object(some_class2) is client
+
+
+def test_async_shutdown(some_class):
+    disposed = []
+
+    async def dispose(obj):
+        disposed.append(obj)
+
+    @haps.scope(haps.ASYNC_SINGLETON_SCOPE)
+    async def factory() -> some_class:
+        return some_class()
+
+    haps.Container.configure([
+        haps.Egg(some_class, some_class, None, factory, dispose=dispose)
+    ])
+
+    async def main():
+        obj = await haps.Container().aget_object(some_class)
+        await haps.Container().ashutdown()
+        return obj
+
+    assert disposed == [asyncio.run(main())]
+
+
+def test_isolated_child_container(some_class):
+    @haps.scope(haps.SINGLETON_SCOPE)
+    class Singleton(some_class):
+        pass
+
+    config = [haps.Egg(some_class, Singleton, None, Singleton)]
+    haps.Container.configure(config)
+    parent = haps.Container()
+    singleton = parent.get_object(some_class)
+
+    shared = parent.child()
+    isolated = parent.child(isolated=True)
+    assert shared.get_object(some_class) is singleton
+    assert isolated.get_object(some_class) is not singleton
+    assert (isolated.get_object(some_class) is
+            isolated.get_object(some_class))
+
+    # storage belongs to the container, so reset releases singletons
+    haps.Container._reset()
+    haps.Container.configure(config)
+    assert haps.Container().get_object(some_class) is not singleton
+
+
+def test_use_profiles(some_class):
+    class NewClass(some_class):
+        pass
+
+    class NewClass2(some_class):
+        pass
+
+    class NewClass3(some_class):
+        pass
+
+    haps.Container.configure([
+        haps.Egg(some_class, NewClass, None, NewClass),
+        haps.Egg(some_class, NewClass2, None, NewClass2, 'test'),
+        haps.Egg(some_class, NewClass3, None, NewClass3, 'prod')
+    ], precompile=[('test',)])
+    default = haps.Container()
+
+    test = haps.Container.use_profiles(('test',))
+    assert haps.Container() is test
+    assert type(test.get_object(some_class)) is NewClass2
+
+    prod = haps.Container.use_profiles(['prod'])
+    assert type(haps.Container().get_object(some_class)) is NewClass3
+    assert prod is not test
+
+    haps.Container.use_profiles(())
+    assert haps.Container() is not default
+    assert type(haps.Container().get_object(some_class)) is NewClass
+
+
+def test_use_profiles_keeps_custom_scopes(some_class):
+    from haps.instrumentation import MetricsCollector
+    from haps.scopes.thread import ThreadScope
+
+    @haps.scope('thread')
+    class Threaded(some_class):
+        pass
+
+    haps.Container.configure([
+        haps.Egg(some_class, Threaded, None, Threaded, 'test'),
+    ], precompile=[('test',)])
+    haps.Container().register_scope('thread', ThreadScope)
+    metrics = MetricsCollector()
+    haps.Container().instrument(metrics)
+
+    test = haps.Container.use_profiles(('test',))
+    obj = test.get_object(some_class)
+    assert type(obj) is Threaded
+    assert test.get_object(some_class) is obj
+    assert metrics.stats[(some_class, None)].resolutions == 2
+
+
+def test_precompiled_profiles_are_validated(some_class, some_class2):
+    class Dependent(some_class2):
+        @haps.inject
+        def __init__(self, dep: some_class):
+            pass
+
+    config = [
+        haps.Egg(some_class, some_class, None, some_class, 'prod'),
+        haps.Egg(some_class2, Dependent, None, Dependent)
+    ]
+    Configuration().set('haps.profiles', ('prod',))
+    with pytest.raises(ConfigurationError):
+        haps.Container.configure(config, precompile=[()])
+
+    haps.Container.configure(config)
+    with pytest.raises(ConfigurationError):
+        haps.Container.use_profiles(())
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires os.fork')
+def test_fork(some_class, some_class2):
+    @haps.scope(haps.SINGLETON_SCOPE)
+    class Safe(some_class):
+        pass
+
+    @haps.scope(haps.SINGLETON_SCOPE)
+    class Unsafe(some_class2):
+        pass
+
+    haps.Container.configure([
+        haps.Egg(some_class, Safe, None, Safe),
+        haps.Egg(some_class2, Unsafe, None, Unsafe, fork_safe=False)
+    ])
+    container = haps.Container()
+    container.prewarm(fork_safe_only=True)
+    safe = container.get_object(some_class)
+    unsafe = container.get_object(some_class2)
+
+    read, write = os.pipe()
+    with haps.Container._lock:
+        # held by the parent while forking, it's replaced in the child
+        pid = os.fork()
+    if pid == 0:  # pragma: no cover
+        ok = (haps.Container().get_object(some_class) is safe and
+              haps.Container().get_object(some_class2) is not unsafe)
+        with haps.Container._lock:
+            os.write(write, b'1' if ok else b'0')
+        os._exit(0)
+
+    os.close(write)
+    os.waitpid(pid, 0)
+    assert os.read(read, 1) == b'1'
+    os.close(read)
+
+
+def test_prewarm_fork_safe_only(some_class, some_class2):
+    @haps.scope(haps.SINGLETON_SCOPE)
+    class Unsafe(some_class):
+        pass
+
+    @haps.scope(haps.SINGLETON_SCOPE)
+    class Dependent(some_class2):
+        @haps.inject
+        def __init__(self, dep: some_class):
+            pass
+
+    haps.Container.configure([
+        haps.Egg(some_class, Unsafe, None, Unsafe, fork_safe=False),
+        haps.Egg(some_class2, Dependent, None, Dependent)
+    ])
+    container = haps.Container()
+    container.prewarm(fork_safe_only=True)
+
+    assert container.scopes[haps.SINGLETON_SCOPE].shutdown() == []
+
+
+def test_get_objects(some_class, some_class2):
+    class Locked(some_class2):
+        pass
+
+    haps.Container.configure([
+        haps.Egg(some_class, some_class, None, some_class),
+        haps.Egg(some_class, Locked, 'locked', haps.scope('custom')(Locked)),
+    ])
+    container = haps.Container()
+
+    class CustomScope(InstanceScope):
+        thread_safe = False
+
+    container.register_scope('custom', CustomScope)
+
+    first, second = container.get_objects([(some_class, None),
+                                           (some_class, 'locked')])
+    assert type(first) is some_class
+    assert type(second) is Locked
+
+    @haps.inject
+    def handler(dep: some_class, other: some_class):
+        return dep, other
+
+    dep, other = handler()
+    assert type(dep) is some_class and dep is not other
+    assert handler(dep=first)[0] is first
+
+
+def test_collection_injection(some_class):
+    class First(some_class):
+        pass
+
+    @haps.scope(haps.SINGLETON_SCOPE)
+    class Second(some_class):
+        pass
+
+    class Override(some_class):
+        pass
+
+    haps.Container.configure([
+        haps.Egg(some_class, First, None, First),
+        haps.Egg(some_class, Second, 'second', Second),
+    ])
+    container = haps.Container()
+
+    objects = container.get_object(List[some_class])
+    assert [type(o) for o in objects] == [First, Second]
+    by_qualifier = container.get_object(Dict[str, some_class])
+    assert list(by_qualifier) == [None, 'second']
+    assert by_qualifier['second'] is objects[1]
+
+    class Handler:
+        all: List[some_class] = haps.Inject()
+
+        @haps.inject
+        def __init__(self, by_qualifier: Dict[str, some_class]):
+            self.by_qualifier = by_qualifier
+
+    handler = Handler()
+    assert [type(o) for o in handler.all] == [First, Second]
+    assert type(handler.by_qualifier[None]) is First
+
+    child = container.child([haps.Egg(some_class, Override, 'new', Override)])
+    assert ([type(o) for o in child.get_object(List[some_class])] ==
+            [First, Second, Override])
+    # overriding existing eggs doesn't copy the index of implementations
+    replacing = container.child([haps.Egg(some_class, Override, None,
+                                          Override)])
+    assert replacing._implementations is container._implementations
+    assert ([type(o) for o in replacing.get_object(List[some_class])] ==
+            [Override, Second])
+
+    async def main():
+        return await container.aget_object(List[some_class])
+
+    assert [type(o) for o in asyncio.run(main())] == [First, Second]
+
+
+def test_lazy_injection(some_class):
+    created = []
+
+    class Dep(some_class):
+        def __init__(self):
+            created.append(self)
+
+        def fun(self):
+            return 'value'
+
+    haps.Container.configure([haps.Egg(some_class, Dep, None, Dep)])
+
+    class Handler:
+        dep: some_class = haps.Inject(lazy=True)
+
+        @haps.inject
+        def __init__(self, other: haps.Lazy[some_class]):
+            self.other = other
+
+    handler = Handler()
+    assert isinstance(handler.dep, haps.Lazy)
+    assert handler.dep is handler.dep
+    assert created == []
+
+    assert handler.other.fun() == 'value'
+    assert handler.other() is created[0]
+    assert handler.other() is created[0]
+    assert type(handler.dep()) is Dep
+    assert len(created) == 2
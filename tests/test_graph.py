@@ -0,0 +1,155 @@
+from typing import Dict, List
+
+import pytest
+
+import haps
+from haps.exceptions import ConfigurationError
+from haps.graph import DependencyGraph
+
+
+class IA:
+    pass
+
+
+class IB:
+    pass
+
+
+class IC:
+    pass
+
+
+def test_dependencies():
+    class A(IA):
+        b: IB = haps.Inject('extra')
+
+        @haps.inject
+        def __init__(self, c: IC):
+            pass
+
+    @haps.inject
+    def b_factory(c: IC) -> IB:
+        pass
+
+    graph = DependencyGraph([
+        haps.Egg(IA, A, None, A),
+        haps.Egg(IB, IB, 'extra', b_factory),
+        haps.Egg(IC, IC, None, IC),
+    ])
+
+    assert graph.dependencies == {
+        (IA, None): [(IC, None)],
+        (IB, 'extra'): [(IC, None)],
+        (IC, None): [],
+    }
+    assert graph.properties == {(IA, None): [(IB, 'extra')], (IC, None): []}
+    assert graph.missing() == []
+    assert graph.cycles() == []
+    assert graph.levels() == [[(IC, None)], [(IA, None), (IB, 'extra')]]
+
+
+def test_missing_dependency():
+    class A(IA):
+        b: IB = haps.Inject()
+
+    with pytest.raises(ConfigurationError) as e:
+        haps.Container.configure([haps.Egg(IA, A, None, A)])
+
+    assert e.value.args[0] == 'Missing dependency IB required by IA'
+
+
+def test_circular_dependency():
+    class A(IA):
+        @haps.inject
+        def __init__(self, b: IB):
+            pass
+
+    class B(IB):
+        @haps.inject
+        def __init__(self, a: IA):
+            pass
+
+    with pytest.raises(ConfigurationError) as e:
+        haps.Container.configure([
+            haps.Egg(IA, A, None, A),
+            haps.Egg(IB, B, None, B),
+        ])
+
+    assert e.value.args[0] == 'Circular dependency IA -> IB -> IA'
+
+
+def test_levels_without_validation():
+    class A(IA):
+        @haps.inject
+        def __init__(self, b: IB, c: IC):
+            pass
+
+    class B(IB):
+        @haps.inject
+        def __init__(self, a: IA):
+            pass
+
+    graph = DependencyGraph([
+        haps.Egg(IA, A, None, A),
+        haps.Egg(IB, B, None, B),
+    ])
+
+    with pytest.raises(ConfigurationError):
+        graph.levels()
+    assert graph.levels(validate=False) == [[(IB, None)], [(IA, None)]]
+
+
+def test_property_cycle_is_allowed():
+    class A(IA):
+        b: IB = haps.Inject()
+
+    class B(IB):
+        a: IA = haps.Inject()
+
+    graph = DependencyGraph([
+        haps.Egg(IA, A, None, A),
+        haps.Egg(IB, B, None, B),
+    ])
+
+    assert graph.cycles() == []
+    graph.validate()
+
+
+def test_collection_dependencies():
+    class A(IA):
+        bs: Dict[str, IB] = haps.Inject()
+
+        @haps.inject
+        def __init__(self, bs: List[IB]):
+            pass
+
+    graph = DependencyGraph([
+        haps.Egg(IA, A, None, A),
+        haps.Egg(IB, IB, None, IB),
+        haps.Egg(IB, IB, 'extra', IB),
+    ])
+
+    assert graph.dependencies[(IA, None)] == [(IB, None), (IB, 'extra')]
+    assert graph.properties[(IA, None)] == [(IB, None), (IB, 'extra')]
+    assert graph.missing() == []
+
+
+def test_lazy_cycle_is_allowed():
+    class A(IA):
+        @haps.inject
+        def __init__(self, b: haps.Lazy[IB]):
+            pass
+
+    class B(IB):
+        @haps.inject
+        def __init__(self, a: IA):
+            pass
+
+    graph = DependencyGraph([
+        haps.Egg(IA, A, None, A),
+        haps.Egg(IB, B, None, B),
+    ])
+
+    assert graph.cycles() == []
+    assert graph.properties[(IA, None)] == [(IB, None)]
+    graph.validate()
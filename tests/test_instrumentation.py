@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import haps
+from haps.instrumentation import MetricsCollector
+
+
+def test_metrics(some_class, some_class2):
+    @haps.scope(haps.SINGLETON_SCOPE)
+    class Slow(some_class):
+        def __init__(self):
+            time.sleep(0.01)
+
+    class Dependent(some_class2):
+        @haps.inject
+        def __init__(self, dep: some_class):
+            pass
+
+    haps.Container.configure([
+        haps.Egg(some_class, Slow, None, Slow),
+        haps.Egg(some_class2, Dependent, 'q', Dependent)
+    ])
+    metrics = MetricsCollector()
+    haps.Container().instrument(metrics)
+
+    for _ in range(3):
+        haps.Container().get_object(some_class2, 'q')
+
+    slow = metrics.stats[(some_class, None)]
+    dependent = metrics.stats[(some_class2, 'q')]
+
+    assert (slow.resolutions, slow.hits, slow.creations) == (3, 2, 1)
+    assert slow.creation_time >= 0.01
+    assert (dependent.resolutions, dependent.hits,
+            dependent.creations) == (3, 0, 3)
+    assert dependent.creation_time >= slow.creation_time
+    assert metrics.hits_by_scope() == {haps.SINGLETON_SCOPE: 2,
+                                       haps.INSTANCE_SCOPE: 0}
+
+    # objects cached with instrumentation are used without it
+    singleton = haps.Container().get_object(some_class)
+    haps.Container().instrument(None)
+    assert haps.Container().get_object(some_class) is singleton
+    haps.Container().get_object(some_class)
+    assert slow.resolutions == 4
+
+
+def test_async_metrics(some_class, some_class2):
+    @haps.scope(haps.ASYNC_SINGLETON_SCOPE)
+    async def factory() -> some_class:
+        await asyncio.sleep(0.01)
+        return some_class()
+
+    @haps.inject
+    async def handler(dep: some_class, other: some_class2):
+        return dep
+
+    haps.Container.configure([
+        haps.Egg(some_class, some_class, None, factory),
+        haps.Egg(some_class2, some_class2, None, some_class2)
+    ])
+    metrics = MetricsCollector()
+    haps.Container().instrument(metrics)
+
+    async def main():
+        await haps.Container().aget_object(some_class)
+        await handler()
+
+    asyncio.run(main())
+
+    stats = metrics.stats[(some_class, None)]
+    assert (stats.resolutions, stats.hits, stats.creations) == (2, 1, 1)
+    assert stats.creation_time >= 0.01
+    other = metrics.stats[(some_class2, None)]
+    assert (other.resolutions, other.hits, other.creations) == (1, 0, 1)
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import sys
+
+import pytest
+
+import haps
+from haps.manifest import LazyFactory, build_manifest, load_manifest, main
+
+BASES = '''
+from haps import base
+
+
+@base
+class IService:
+    pass
+'''
+
+IMPLEMENTATION = '''
+from haps import SINGLETON_SCOPE, egg, scope
+from lazy_pkg.bases import IService
+
+
+def close_service(service):
+    service.closed = True
+
+
+@egg(dispose=close_service)
+@scope(SINGLETON_SCOPE)
+class Service(IService):
+    closed = False
+
+
+@egg(qualifier='test', profile='test')
+def service_factory() -> IService:
+    return Service()
+'''
+
+
+@pytest.fixture
+def lazy_pkg(tmp_path, monkeypatch):
+    pkg = tmp_path / 'lazy_pkg'
+    pkg.mkdir()
+    (pkg / '__init__.py').write_text('')
+    (pkg / 'bases.py').write_text(BASES)
+    (pkg / 'impl.py').write_text(IMPLEMENTATION)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(haps.egg, 'factories', [])
+    monkeypatch.setattr(haps.base, 'classes', set(haps.base.classes))
+    yield 'lazy_pkg'
+    for name in list(sys.modules):
+        if name.startswith('lazy_pkg'):
+            del sys.modules[name]
+
+
+def test_build_manifest(lazy_pkg):
+    manifest = build_manifest([lazy_pkg])
+
+    assert manifest == {
+        'version': 1,
+        'eggs': [
+            {'base': 'lazy_pkg.bases:IService',
+             'egg': 'lazy_pkg.impl:Service',
+             'qualifier': None,
+             'profile': None,
+             'scope': haps.SINGLETON_SCOPE,
+             'dispose': 'lazy_pkg.impl:close_service',
+             'fork_safe': True,
+             'async': False},
+            {'base': 'lazy_pkg.bases:IService',
+             'egg': 'lazy_pkg.impl:service_factory',
+             'qualifier': 'test',
+             'profile': 'test',
+             'scope': None,
+             'dispose': None,
+             'fork_safe': True,
+             'async': False},
+        ]
+    }
+
+
+def test_lambda_is_not_importable(lazy_pkg, tmp_path):
+    (tmp_path / lazy_pkg / 'lambda_impl.py').write_text(
+        'from haps import egg\n'
+        'from lazy_pkg.bases import IService\n\n\n'
+        '@egg(qualifier="lambda", dispose=lambda service: None)\n'
+        'class LambdaService(IService):\n'
+        '    pass\n')
+
+    with pytest.raises(haps.exceptions.ConfigurationError):
+        build_manifest([lazy_pkg])
+
+
+def test_autodiscover_with_manifest(lazy_pkg, tmp_path):
+    manifest = tmp_path / 'haps.json'
+    main([lazy_pkg, '-o', str(manifest)])
+    del sys.modules['lazy_pkg.impl']
+
+    haps.Container.autodiscover([lazy_pkg], manifest=str(manifest))
+
+    assert 'lazy_pkg.impl' not in sys.modules
+    from lazy_pkg.bases import IService
+    service = haps.Container().get_object(IService)
+    assert type(service).__name__ == 'Service'
+    assert 'lazy_pkg.impl' in sys.modules
+    assert haps.Container().get_object(IService) is service
+
+    haps.Container().shutdown()
+    assert service.closed
+
+
+def test_shutdown_skips_unused_manifest_eggs(lazy_pkg, tmp_path):
+    (tmp_path / lazy_pkg / 'broken.py').write_text(
+        'from haps import Inject, egg\n'
+        'from lazy_pkg.bases import IService\n\n\n'
+        'class IMissing:\n'
+        '    pass\n\n\n'
+        '@egg(qualifier="broken")\n'
+        'class Broken(IService):\n'
+        '    missing: IMissing = Inject()\n')
+    manifest = tmp_path / 'haps.json'
+    main([lazy_pkg, '-o', str(manifest)])
+    del sys.modules['lazy_pkg.broken']
+
+    haps.Container.autodiscover([lazy_pkg], manifest=str(manifest))
+    from lazy_pkg.bases import IService
+    service = haps.Container().get_object(IService)
+
+    haps.Container().shutdown()
+    assert service.closed
+    assert 'lazy_pkg.broken' not in sys.modules
+
+
+def test_async_factory_in_singleton_scope_is_rejected(lazy_pkg, tmp_path):
+    (tmp_path / lazy_pkg / 'async_impl.py').write_text(
+        'from haps import SINGLETON_SCOPE, egg, scope\n'
+        'from lazy_pkg.bases import IService\n\n\n'
+        '@egg(qualifier="async")\n'
+        '@scope(SINGLETON_SCOPE)\n'
+        'async def make() -> IService:\n'
+        '    return IService()\n')
+    manifest = tmp_path / 'haps.json'
+    main([lazy_pkg, '-o', str(manifest)])
+
+    haps.Container.autodiscover([lazy_pkg], manifest=str(manifest))
+    from lazy_pkg.bases import IService
+
+    with pytest.raises(haps.exceptions.CallError):
+        asyncio.run(haps.Container().aget_object(IService, 'async'))
+
+
+def test_load_manifest_wrong_version(tmp_path):
+    manifest = tmp_path / 'haps.json'
+    manifest.write_text(json.dumps({'version': 0, 'eggs': []}))
+
+    with pytest.raises(haps.exceptions.ConfigurationError):
+        load_manifest(str(manifest))
+
+
+def test_lazy_factory():
+    factory = LazyFactory('collections:OrderedDict', haps.SINGLETON_SCOPE)
+
+    assert getattr(factory, '__haps_custom_scope') == haps.SINGLETON_SCOPE
+    assert factory(a=1) == {'a': 1}
@@ -0,0 +1,155 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+
+import pytest
+
+import haps
+from haps.exceptions import InactiveScope, PoolExhausted
+from haps.scopes.context import context_scope
+from haps.scopes.pool import PoolScope, pooled
+
+
+def test_objects_reused(some_class):
+    scope = PoolScope()
+    with context_scope():
+        first = scope.get_object(some_class)
+        assert scope.get_object(some_class) is first
+        with context_scope():
+            second = scope.get_object(some_class)
+    with context_scope():
+        third = scope.get_object(some_class)
+
+    assert first is not second
+    assert third in (first, second)
+
+
+def test_inactive_scope(some_class):
+    with pytest.raises(InactiveScope):
+        PoolScope().get_object(some_class)
+
+
+def test_reset_on_release(some_class):
+    released = []
+
+    class Pool(PoolScope):
+        def reset(self, obj):
+            released.append(obj)
+
+    scope = Pool()
+    with scope.checkout(some_class) as obj:
+        assert not released
+    assert released == [obj]
+
+
+def test_pool_exhausted(some_class):
+    class Pool(PoolScope):
+        max_size = 1
+        timeout = 0.01
+
+    scope = Pool()
+    with scope.checkout(some_class):
+        with pytest.raises(PoolExhausted):
+            scope.acquire(some_class)
+
+
+def test_held_by_current_thread(some_class):
+    class Pool(PoolScope):
+        max_size = 1
+
+    scope = Pool()
+    with scope.checkout(some_class):
+        # waiting for itself would never end
+        with pytest.raises(PoolExhausted):
+            scope.acquire(some_class)
+    with scope.checkout(some_class):
+        pass
+
+
+def test_wait_for_free_object(some_class):
+    class Pool(PoolScope):
+        max_size = 1
+
+    scope = Pool()
+    checked_out = Event()
+
+    def hold():
+        with scope.checkout(some_class) as obj:
+            checked_out.set()
+            return obj
+
+    with ThreadPoolExecutor(1) as pool:
+        held = pool.submit(hold)
+        checked_out.wait()
+        with scope.checkout(some_class) as obj:
+            assert obj is held.result()
+
+
+def test_idle_eviction(some_class):
+    class Pool(PoolScope):
+        min_size = 1
+        idle_timeout = 0
+
+    scope = Pool()
+    with scope.checkout(some_class) as first:
+        with scope.checkout(some_class) as second:
+            pass
+
+    with scope.checkout(some_class) as obj:
+        # only min_size objects survive
+        assert obj is first or obj is second
+        with scope.checkout(some_class) as new:
+            assert new is not first and new is not second
+
+
+def test_evicted_objects_disposed():
+    disposed = []
+
+    class Client:
+        def __exit__(self, *exc_info):
+            disposed.append(self)
+
+    class Pool(PoolScope):
+        idle_timeout = 0
+
+    scope = Pool()
+    with scope.checkout(Client) as client:
+        assert not disposed
+    assert disposed == [client]
+
+
+def test_pooled_dependency(some_class):
+    @haps.scope('pool')
+    class Pooled(some_class):
+        pass
+
+    haps.Container.configure([
+        haps.Egg(some_class, Pooled, None, Pooled)
+    ])
+    haps.Container().register_scope('pool', PoolScope)
+
+    class Handler:
+        dep: some_class = haps.Inject()
+
+    with context_scope():
+        dep = Handler().dep
+    with pooled(some_class) as obj:
+        assert obj is dep
+
+
+def test_injections_within_scope_share_object(some_class):
+    @haps.scope('pool')
+    class Pooled(some_class):
+        pass
+
+    haps.Container.configure([
+        haps.Egg(some_class, Pooled, None, Pooled)
+    ])
+    haps.Container().register_scope('pool', PoolScope)
+
+    @haps.inject
+    def handler(dep: some_class):
+        return dep
+
+    with context_scope():
+        objects = {handler() for _ in range(PoolScope.max_size + 1)}
+    assert len(objects) == 1
@@ -1,3 +1,6 @@
+import threading
+import time
+
 from haps.scopes.singleton import SingletonScope
 
 
@@ -12,3 +15,30 @@ def test_get_multiple_objects(some_class):
     objects = {scope.get_object(some_class) for _ in range(100)}
     assert all(isinstance(o, some_class) for o in objects)
     assert len({id(o) for o in objects}) == 1
+
+
+def test_concurrent_creation():
+    created = []
+
+    class Slow:
+        def __init__(self):
+            created.append(self)
+            time.sleep(0.01)
+
+    scope = SingletonScope()
+    threads = [threading.Thread(target=scope.get_object, args=(Slow,))
+               for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(created) == 1
+    assert scope.get_object(Slow) is created[0]
+
+
+def test_scopes_are_independent(some_class):
+    first, second = SingletonScope(), SingletonScope()
+
+    assert first.get_object(some_class) is first.bind(some_class)()
+    assert first.get_object(some_class) is not second.get_object(some_class)